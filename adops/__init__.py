@@ -0,0 +1 @@
+"""Núcleo do IAdops: leitura dos relatórios do GAM, índice de blocos e precificação."""
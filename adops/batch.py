@@ -0,0 +1,95 @@
+"""Precificação em lote: um par P1/P2 por site, processado em paralelo.
+
+Os arquivos são pareados pelo nome (`site_P1.csv` / `site_P2.csv` ou `P1_site.csv`, também .csv.gz)."""
+import io
+import multiprocessing as mp
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from adops.parsing import load_report, normalize_text
+from adops.pricing import P1_COLS, P1_NEED, P2_COLS, P2_NEED, missing_cols, summarize_pair
+
+_PAIR_RE = re.compile(
+    r"^(?:p(?P<a>[12])[ _.-]+(?P<site_a>.+)|(?P<site_b>.+?)[ _.-]+p(?P<b>[12]))\.csv(?:\.gz)?$",
+    re.IGNORECASE,
+)
+
+def report_slot(name: str):
+    """(site, "p1"|"p2") pelo nome do arquivo; None se o nome não segue o padrão."""
+    m = _PAIR_RE.match(os.path.basename(name))
+    if not m:
+        return None
+    site = normalize_text(m.group("site_a") or m.group("site_b"))
+    return (site, "p" + (m.group("a") or m.group("b"))) if site else None
+
+def zip_members(data):
+    """(nome, bytes) de cada arquivo de um ZIP (sem pastas nem __MACOSX)."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        for info in zf.infolist():
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+            yield info.filename, zf.read(info)
+
+def expand_uploads(files):
+    """(nome, bytes) de cada CSV enviado; ZIPs são abertos e cada CSV interno vira um arquivo
+    (.csv.gz segue compactado: load_report descompacta em fluxo)."""
+    for f in files:
+        data = f.getvalue()
+        if zipfile.is_zipfile(io.BytesIO(data)):
+            yield from zip_members(data)
+        else:
+            yield f.name, data
+
+def pair_reports(named):
+    """Agrupa (nome, conteúdo) por site.
+
+    Retorna ({site: (p1, p2)} só com pares completos, sites sem par, nomes fora do padrão)."""
+    slots, ignored = {}, []
+    for name, data in named:
+        slot = report_slot(name)
+        if slot is None:
+            ignored.append(os.path.basename(name))
+            continue
+        site, which = slot
+        slots.setdefault(site, {})[which] = data
+    pairs = {s: (v["p1"], v["p2"]) for s, v in sorted(slots.items()) if len(v) == 2}
+    incomplete = sorted(s for s in slots if s not in pairs)
+    return pairs, incomplete, ignored
+
+def _open(src):
+    return io.BytesIO(src) if isinstance(src, (bytes, bytearray)) else open(src, "rb")
+
+def price_pair(site, p1_src, p2_src, cpa, roas):
+    """Lê e precifica um par; erros viram uma linha com a coluna "Erro" (o lote não para)."""
+    try:
+        with _open(p1_src) as f1, _open(p2_src) as f2:
+            p1, m1, _, u1 = load_report(f1, P1_COLS)
+            p2, m2, _, u2 = load_report(f2, P2_COLS)
+        miss = [f"P1: {c}" for c in missing_cols(m1, P1_NEED)] + [f"P2: {c}" for c in missing_cols(m2, P2_NEED)]
+        if miss:
+            return {"Site": site, "Erro": "faltam colunas: " + ", ".join(miss)}
+        return {"Site": site, **summarize_pair(p1, u1, p2, u2, cpa, roas)}
+    except Exception as e:
+        return {"Site": site, "Erro": str(e)}
+
+def run_batch(pairs, cpa, roas, workers=None):
+    """Precifica {site: (p1, p2)} num pool de processos; uma linha por site, na ordem dos sites.
+
+    p1/p2 podem ser bytes ou caminhos. Com um único par (ou workers=1) roda no próprio processo."""
+    sites = list(pairs)
+    workers = min(workers or os.cpu_count() or 1, len(sites))
+    if workers <= 1:
+        rows = [price_pair(s, *pairs[s], cpa, roas) for s in sites]
+    else:
+        # spawn: não herda o estado do Streamlit (threads, sockets) do processo pai
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn")) as pool:
+            futs = [pool.submit(price_pair, s, *pairs[s], cpa, roas) for s in sites]
+            rows = [f.result() for f in futs]
+    out = pd.DataFrame(rows)
+    if "Erro" in out.columns:
+        out["Erro"] = out["Erro"].fillna("")
+    return out
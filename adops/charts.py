@@ -0,0 +1,29 @@
+"""Gráficos compartilhados pelas páginas (altair)."""
+import numpy as np
+import pandas as pd
+
+def heatmap(z, xs, ys, x_title, y_title, z_title, max_side=60):
+    """Mapa de calor de z[len(ys), len(xs)].
+
+    Grades maiores que max_side × max_side são amostradas em passo fixo: o navegador
+    desenha no máximo ~3.600 células, não importa o tamanho da varredura."""
+    import altair as alt  # ~0,3 s de import: só quando a página desenha o gráfico
+
+    sy, sx = -(-len(ys) // max_side), -(-len(xs) // max_side)
+    z, xs, ys = np.asarray(z)[::sy, ::sx], np.round(xs[::sx], 4), np.round(ys[::sy], 4)
+    df = pd.DataFrame({
+        x_title: np.tile(xs, len(ys)),
+        y_title: np.repeat(ys, len(xs)),
+        z_title: z.ravel(),
+    })
+    # field=/type= explícitos: nomes como "ROAS (%)" confundem a sintaxe abreviada do altair
+    return alt.Chart(df).mark_rect().encode(
+        x=alt.X(field=x_title, type="ordinal"),
+        y=alt.Y(field=y_title, type="ordinal", sort="descending"),
+        color=alt.Color(field=z_title, type="quantitative", scale=alt.Scale(scheme="viridis")),
+        tooltip=[
+            alt.Tooltip(field=x_title, type="ordinal"),
+            alt.Tooltip(field=y_title, type="ordinal"),
+            alt.Tooltip(field=z_title, type="quantitative", format=".4f"),
+        ],
+    )
@@ -0,0 +1,74 @@
+"""Linha de comando do IAdops (sem Streamlit): `python -m adops price DIR... --cpa X --roas Y`
+e `python -m adops serve` (serviço HTTP local, ver adops.server).
+
+Os imports pesados (pandas/pyarrow) só acontecem depois de ler os argumentos."""
+import argparse
+import sys
+from pathlib import Path
+
+def _collect(paths):
+    """Arquivos .csv/.csv.gz dos diretórios (não recursivo) e dos arquivos passados diretamente."""
+    for p in map(Path, paths):
+        if p.is_dir():
+            yield from sorted(f for f in p.iterdir() if f.is_file() and f.name.lower().endswith((".csv", ".csv.gz")))
+        else:
+            yield p
+
+def _write(df, out):
+    if out is None or str(out) == "-":
+        df.to_csv(sys.stdout, index=False)
+    elif out.suffix.lower() == ".parquet":
+        df.to_parquet(out, index=False)
+    else:
+        df.to_csv(out, index=False)
+
+def cmd_price(args):
+    from adops.batch import pair_reports, run_batch
+
+    pairs, incompletos, ignorados = pair_reports((f.name, str(f)) for f in _collect(args.paths))
+    for site in incompletos:
+        print(f"aviso: {site} sem o par P1/P2", file=sys.stderr)
+    for name in ignorados:
+        print(f"aviso: {name} fora do padrão site_P1.csv / site_P2.csv", file=sys.stderr)
+    if not pairs:
+        print("erro: nenhum par P1/P2 encontrado", file=sys.stderr)
+        return 2
+    res = run_batch(pairs, args.cpa, args.roas, workers=args.workers)
+    _write(res, args.output)
+    erros = res["Erro"].astype(bool).sum() if "Erro" in res.columns else 0
+    print(f"{len(res)} site(s) precificado(s), {erros} com erro", file=sys.stderr)
+    return 1 if erros else 0
+
+def cmd_serve(args):
+    from adops.server import make_server, serve
+
+    server = make_server(args.host, args.port, args.workers, args.max_batch, args.batch_wait / 1000.0)
+    print(f"adops serve em http://{args.host}:{server.server_address[1]} (Ctrl+C para sair)", file=sys.stderr)
+    serve(server)
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="adops", description="Precificação dos relatórios do GAM.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    price = sub.add_parser("price", help="precifica pares site_P1.csv / site_P2.csv")
+    price.add_argument("paths", nargs="+", help="diretórios ou arquivos CSV do GAM")
+    price.add_argument("--cpa", type=float, required=True, help="CPA médio (US$)")
+    price.add_argument("--roas", type=float, required=True, help="ROAS desejado (%%)")
+    price.add_argument("-o", "--output", type=Path, help="saída .csv ou .parquet (padrão: CSV no stdout)")
+    price.add_argument("-j", "--workers", type=int, help="processos em paralelo (padrão: nº de CPUs)")
+    price.set_defaults(func=cmd_price)
+
+    srv = sub.add_parser("serve", help="serviço HTTP local de precificação (/p1, /p2, /lote, /metrics)")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8765)
+    srv.add_argument("-j", "--workers", type=int, help="processos para /lote (padrão: nº de CPUs)")
+    srv.add_argument("--max-batch", type=int, default=8192, help="linhas por micro-lote de /p1 e /p2")
+    srv.add_argument("--batch-wait", type=float, default=0.0,
+                     help="ms de espera por mais pedidos antes de calcular um micro-lote (padrão: 0)")
+    srv.set_defaults(func=cmd_serve)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
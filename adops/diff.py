@@ -0,0 +1,97 @@
+"""Comparação de dois snapshots do mesmo relatório (ex.: ontem x hoje), bloco a bloco.
+
+Os blocos são casados pela chave normalizada (acentos, caixa e separadores não contam)
+num join pelo índice; deltas e sinalizações saem de uma passada vetorizada."""
+import numpy as np
+import pandas as pd
+
+from adops.parsing import normalize_series
+
+# métrica -> (rótulo, coluna convertida, agregação entre linhas repetidas do mesmo bloco):
+# "soma" soma; "media" é a média ponderada por solicitações
+DIFF_METRICS = {
+    "solicitacoes": ("Solicitações", "_sol", "soma"),
+    "cliques": ("Cliques", "_cli", "soma"),
+    "impressoes": ("Impressões", "_imp", "soma"),
+    "receita": ("Receita", "_rec", "soma"),
+    "cpc": ("CPC", "_cpc", "media"),
+    "ctr": ("CTR (%)", "_ctr", "media"),
+    "taxa": ("Taxa (%)", "_taxa", "media"),
+}
+
+def _floats(s: pd.Series):
+    return s.to_numpy("float64", na_value=np.nan)
+
+def snapshot(report):
+    """Uma linha por bloco (índice = chave normalizada) com as métricas presentes no relatório.
+
+    `report` é o retorno de load_report; a linha Total fica de fora."""
+    df, m, _, units = report
+    keep = np.asarray(units["categoria"] != "total")
+    bloco = df[m["bloco"]].astype("category")  # load_report já lê o bloco como categoria
+    codes = bloco.cat.codes.to_numpy()[keep]
+    names = bloco.cat.categories
+    # normaliza cada nome distinto uma vez; nomes que diferem só na grafia viram o mesmo bloco
+    key_of_name, keys = pd.factorize(normalize_series(pd.Series(names)))
+    ok = codes >= 0
+    g = key_of_name[codes[ok]]
+    n = len(keys)
+    first = np.zeros(n, np.int64)
+    first[g[::-1]] = np.arange(len(g))[::-1]  # primeira linha de cada bloco
+    seen = np.bincount(g, minlength=n) > 0  # categorias sem linha (ex.: só no Total) ficam de fora
+    out = {
+        "bloco": names.take(codes[ok][first]) if len(g) else np.array([], object),
+        "categoria": np.asarray(units["categoria"].astype(str))[keep][ok][first] if len(g) else np.array([], object),
+    }
+    sol = _floats(df["_sol"])[keep][ok] if "_sol" in df else np.full(len(g), np.nan)
+    for metric, (_, col, how) in DIFF_METRICS.items():
+        if col not in df:
+            continue
+        x = _floats(df[col])[keep][ok]
+        has = ~np.isnan(x)
+        if how == "soma":
+            total = np.bincount(g, np.where(has, x, 0.0), n)
+            out[metric] = np.where(np.bincount(g, has, n) > 0, total, np.nan)
+        else:
+            w = np.where(has & (sol > 0), sol, 0.0)
+            den = np.bincount(g, w, n)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[metric] = np.where(den > 0, np.bincount(g, np.where(w > 0, x * w, 0.0), n) / den, np.nan)
+    return pd.DataFrame(out, index=pd.Index(keys, name="chave"))[seen]
+
+def compare(before, after, threshold=0.2, min_sol=0):
+    """Junta dois snapshots pela chave: antes, depois, delta e variação relativa de cada métrica.
+
+    Status: "novo" / "removido" para blocos de um lado só; "variou" quando alguma métrica
+    mudou mais que `threshold` (0.2 = 20%) num bloco com pelo menos `min_sol`
+    solicitações em um dos dois dias; senão "estável"."""
+    metrics = [k for k in DIFF_METRICS if k in before or k in after]
+    j = before.join(after, how="outer", lsuffix="_a", rsuffix="_d", sort=True)
+    novo = j["bloco_a"].isna().to_numpy()
+    removido = j["bloco_d"].isna().to_numpy()
+    out = pd.DataFrame({
+        "Bloco": j["bloco_d"].fillna(j["bloco_a"]),
+        "Categoria": j["categoria_d"].fillna(j["categoria_a"]),
+    })
+    sol = np.fmax(_floats(j["solicitacoes_a"]), _floats(j["solicitacoes_d"])) if "solicitacoes" in metrics else None
+    volume = sol >= min_sol if sol is not None else np.ones(len(j), bool)
+    moved = np.zeros(len(j), np.uint8)  # bit i: métrica i passou do limiar
+    for i, metric in enumerate(metrics):
+        label = DIFF_METRICS[metric][0]
+        a = _floats(j[f"{metric}_a"]) if f"{metric}_a" in j else np.full(len(j), np.nan)
+        d = _floats(j[f"{metric}_d"]) if f"{metric}_d" in j else np.full(len(j), np.nan)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            rel = np.where(a == 0, np.where(d == 0, 0.0, np.inf), (d - a) / np.abs(a))
+        # métrica ausente de um lado (NaN) não conta como variação
+        flag = (np.abs(rel) > threshold) & volume & ~novo & ~removido & ~np.isnan(a) & ~np.isnan(d)
+        moved |= flag.astype(np.uint8) << i
+        out[f"{label} antes"] = a
+        out[f"{label} depois"] = d
+        out[f"Δ {label}"] = d - a
+        out[f"Δ% {label}"] = np.where(np.isnan(a) | np.isnan(d), np.nan, rel * 100.0)
+    # um texto por combinação de métricas sinalizadas, não por bloco
+    combos, inverse = np.unique(moved, return_inverse=True)
+    names = [", ".join(DIFF_METRICS[m][0] for i, m in enumerate(metrics) if c >> i & 1) for c in combos]
+    out.insert(2, "Status", np.select([novo, removido, moved > 0], ["novo", "removido", "variou"], "estável"))
+    out.insert(3, "Variações", np.asarray(names, dtype=object)[inverse])
+    return out.reset_index(drop=True)
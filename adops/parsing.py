@@ -0,0 +1,670 @@
+"""Leitura dos relatórios do GAM: cabeçalho, separador, mapeamento de colunas e
+conversão de números pt-BR/en-US."""
+import csv
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+import zipfile
+from contextlib import contextmanager
+from datetime import date
+from functools import lru_cache
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from adops.paths import data_dir
+from adops.profiling import maybe_stage
+from adops.units import build_unit_index
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+_UNDERSCORES_RE = re.compile(r"_+")
+
+@lru_cache(maxsize=8192)
+def normalize_text(s: str) -> str:
+    s = str(s).replace("\u00A0", " ").strip()
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = s.lower()
+    s = _NON_ALNUM_RE.sub("_", s)
+    s = _UNDERSCORES_RE.sub("_", s).strip("_")
+    return s
+
+def normalize_series(values: pd.Series) -> pd.Series:
+    """normalize_text em uma coluna inteira: nomes ASCII pelas operações vetorizadas do
+    Arrow (sem acento não há o que decompor); só os demais passam pelo normalize_text."""
+    s = values.astype("string[pyarrow]")
+    out = s.str.lower().str.replace(r"[^a-z0-9]+", "_", regex=True).str.strip("_")
+    other = ~s.str.isascii().fillna(True)
+    if other.any():
+        out[other] = s[other].map(normalize_text)
+    return out
+
+def to_number(x):
+    """Conversor pt-BR/en-US robusto (para %/CPC etc.)."""
+    s = str(x).strip().replace("\u00A0", " ")
+    s = s.replace("US$", "").replace("R$", "").replace("%", "").strip()
+    s = s.replace(" ", "")
+    if "," in s and "." in s:
+        if s.rfind(",") > s.rfind("."):
+            s = s.replace(".", "")
+            s = s.replace(",", ".")
+        else:
+            s = s.replace(",", "")
+    else:
+        if "," in s:
+            s = s.replace(".", "")
+            s = s.replace(",", ".")
+    try:
+        return float(s)
+    except Exception:
+        return float("nan")
+
+_COUNT_JUNK_RE = re.compile(r"[^0-9,\.]")
+_THOUSANDS_DOT_RE = re.compile(r"^\d{1,3}(\.\d{3})+$")
+
+def to_count(x):
+    """CONTAGENS (Solicitações/Cliques/Impressões) — entende '.' como milhar."""
+    s = str(x).strip().replace("\u00A0", " ")
+    s = s.replace("US$", "").replace("R$", "").replace("%", "")
+    s = s.replace(" ", "")
+    s = _COUNT_JUNK_RE.sub("", s)
+    if "," in s and "." in s:
+        if s.rfind(",") > s.rfind("."):
+            s = s.replace(".", "")
+            s = s.split(",")[0]
+        else:
+            s = s.replace(",", "")
+            s = s.split(".")[0]
+    elif "," in s:
+        s = s.split(",")[0].replace(".", "")
+    elif "." in s:
+        if _THOUSANDS_DOT_RE.match(s):
+            s = s.replace(".", "")
+        else:
+            s = s.split(".")[0]
+    s = s or "0"
+    try:
+        return int(s)
+    except Exception:
+        try:
+            return int(float(s))
+        except Exception:
+            return 0
+
+# versões por coluna: mesmas regras de to_number/to_count, numa varredura NumPy dos bytes
+# UTF-8 da coluna (um caractere por vez, com as células alinhadas à direita); só o que a
+# varredura não cobre (sinal '+', outros caracteres, células longas, números grandes demais
+# para o float/int64 exatos) cai no caminho por célula.
+_TEXT = "string[pyarrow]"
+_MONEY = "US\\$|R\\$"
+_SCAN_WIDTH = 24  # células maiores que isso vão para o caminho por célula
+_SCAN_BLOCK = 1 << 16  # linhas por passada: os temporários de cada caractere cabem no cache
+_MAX_DIGITS = {"number": 15, "count": 18}  # até aqui o inteiro dos dígitos é exato
+_INT64_MAX = np.iinfo(np.int64).max
+_POW10 = 10.0 ** np.arange(_MAX_DIGITS["number"] + 1)
+_POW10_INT = 10 ** np.arange(_MAX_DIGITS["count"] + 1, dtype=np.int64)
+
+def _as_text(col: pd.Series) -> pd.Series:
+    return col if col.dtype == _TEXT else col.astype(_TEXT)
+
+def _any(mask: pd.Series) -> bool:
+    return bool(mask.any())
+
+def _utf8(s: pd.Series):
+    """(início, fim, bytes, nulos) das células de uma série de texto Arrow, sem cópia."""
+    a = pa.array(s.array)
+    if isinstance(a, pa.ChunkedArray):
+        a = a.combine_chunks()
+    width = np.int64 if pa.types.is_large_string(a.type) else np.int32
+    off = np.frombuffer(a.buffers()[1], width)[a.offset:a.offset + len(a) + 1].astype(np.int64)
+    data = a.buffers()[2]
+    data = np.frombuffer(data, np.uint8)[off[0]:off[-1]] if data is not None else np.zeros(0, np.uint8)
+    off -= off[0]  # uma fatia (bloco) da série vê só os próprios bytes
+    return off[:-1], off[1:], data, a.is_null().to_numpy(zero_copy_only=False)
+
+def _columns(end, size, data, width):
+    """Bytes das células alinhadas à direita numa janela de `width`, um caractere por vez
+    da esquerda para a direita: (bytes, dentro da célula); fora da célula vem espaço.
+
+    `size` conta os últimos bytes de cada célula que entram na janela (sem a moeda pulada)."""
+    buf = np.concatenate([np.full(width, 32, np.uint8), data])
+    size = np.minimum(size, 255).astype(np.uint8)
+    shortest = int(size.min(initial=0))
+    pos = end.copy()  # em buf, o caractere j da janela de cada célula fica em end + j
+    for j in range(width):
+        inside = size >= np.uint8(width - j)
+        c = np.take(buf, pos)
+        yield (c if width - j <= shortest else c * inside | ~inside * np.uint8(32)), inside
+        pos += 1
+
+def _skipped(c, skip):
+    """Bytes de `skip` (tokens de um byte já tirados pela inferência: espaço, '%')."""
+    out = np.zeros(len(c), bool)
+    for ch in skip:
+        out |= c == ord(ch)
+    return out
+
+def _grouped(groups, digits, kept):
+    """1 a 3 dígitos e grupos de 3 separados por um só caractere: os separadores estão
+    exatamente nas posições ≡ kept (mod 4), contadas da esquerda entre os `kept` caracteres."""
+    mod = np.left_shift(np.uint8(1), kept & np.uint8(3))
+    return (groups == mod) & (digits & mod == 0) & (mod != 1)
+
+def _money_prefix(start, size, data):
+    """Bytes de 'US$' ou 'R$' (e do espaço logo após) no início de cada célula, que
+    to_number tira; None se a coluna não tem '$'. Pulá-los evita que a moeda estique a
+    janela da varredura ou mande a célula para o caminho por célula."""
+    if not (data == 36).any():
+        return None
+    buf = np.concatenate([data, np.zeros(3, np.uint8)])  # leituras até 3 bytes além do fim
+    b0, b1, b2, b3 = (np.take(buf[k:], start) for k in range(4))
+    us = (b0 == 85) & (b1 == 83) & (b2 == 36)
+    rs = (b0 == 82) & (b1 == 36)
+    skip = us * np.uint8(3) | rs * np.uint8(2)
+    skip += (skip > 0) & (np.where(us, b3, b2) == 32)
+    # as leituras podem ter passado do fim da célula: só vale o que coube nela
+    return skip * (skip <= np.minimum(size, 4))
+
+def _scan_number(s: pd.Series, thousands=None, skip=""):
+    """to_number das células com dígitos, ',', '.', espaço, '%' e '-' à frente.
+
+    Sem `thousands`, 'US$'/'R$' no início da célula também são ignorados. Com `thousands`,
+    células só com dígitos agrupados por ele (ex.: '1.234.567', sem outro caractere fora
+    de `skip`) valem o inteiro dos dígitos. Retorna (valores, células que ficaram para o
+    caminho por célula)."""
+    start, end, data, null = _utf8(s)
+    n = len(start)
+    size = end - start
+    prefix = None if thousands else _money_prefix(start, size, data)  # parse_col já tira os tokens
+    if prefix is not None:
+        size -= prefix
+    width = int(min(size.max(initial=0), _SCAN_WIDTH))
+    slow = size > width
+    signed = bool((data == 45).any())  # '-'
+    num = np.zeros(n)
+    # até 4 dígitos seguidos acumulam em uint16 (acc, escala 10^k) e só então entram no
+    # float: num = num * escala + acc, uma conta em float a cada 4 caracteres
+    acc, scale = np.zeros(n, np.uint16), np.ones(n, np.uint16)
+    neg, unclean = np.zeros(n, bool), np.zeros(n, bool)
+    ndig, ncom, ndot, after, last, kept, groups, digits = (np.zeros(n, np.uint8) for _ in range(8))
+    for j, (c, inside) in enumerate(_columns(end, size, data, width)):
+        d = c - np.uint8(48)
+        dig = d < 10
+        com, dot = c == 44, c == 46
+        sep = com | dot
+        blank = (c == 32) | (c == 37)
+        ok = dig | sep | blank
+        if signed:  # '-' só antes de qualquer dígito ou separador
+            lead = (c == 45) & ~neg & (ndig == 0) & (ncom == 0) & (ndot == 0)
+            neg |= lead
+            ok |= lead
+        slow |= ~ok
+        ten = dig * np.uint8(9) + np.uint8(1)  # acc = acc * 10 + d nos dígitos
+        acc *= ten
+        acc += d * dig
+        scale *= ten
+        if j % 4 == 3 or j == width - 1:
+            num *= scale
+            num += acc
+            acc[:], scale[:] = 0, 1
+        after = (after + dig) * ~sep  # dígitos depois do último separador
+        last += (c - last) * sep
+        if thousands:
+            group = dot if thousands == "." else com
+            bit = np.left_shift(np.uint8(1), kept & np.uint8(3))
+            groups |= bit * group
+            digits |= bit * dig
+            kept += dig | group
+            unclean |= inside & blank & ~_skipped(c, skip)
+        ndig += dig
+        ncom += com
+        ndot += dot
+    # o último separador é o decimal; o outro tipo é milhar e some
+    has_sep = (ncom > 0) | (ndot > 0)
+    out = num / _POW10[np.minimum(after, _MAX_DIGITS["number"]) * has_sep]
+    nan = (ndig == 0) | has_sep & (np.where(last == 44, ncom, ndot) > 1)
+    if thousands:
+        whole = _grouped(groups, digits, kept) & ((ncom if thousands == "." else ndot) == 0) & ~unclean
+        out[whole] = num[whole]
+        nan &= ~whole
+    out[neg] = -out[neg]
+    out[nan | null] = np.nan
+    slow |= ndig > _MAX_DIGITS["number"]
+    return out, slow & ~null
+
+def _scan_count(s: pd.Series, thousands=".", skip=""):
+    """to_count de todas as células: só dígitos, ',' e '.' contam.
+
+    thousands="," é o formato en-US: '1,234' vale 1234 e '1.234' vale 1, se a célula não
+    tiver outro caractere fora de `skip`. Retorna (valores, células que ficaram para o
+    caminho por célula: dígitos demais para o int64 exato ou, em en-US, vários pontos)."""
+    start, end, data, null = _utf8(s)
+    n = len(start)
+    size = end - start
+    width = int(min(size.max(initial=0), _SCAN_WIDTH))
+    total = np.zeros(n, np.int64)
+    stray = np.zeros(n, bool)
+    ndig, ncom, ndot, upto_c, upto_d, last, kept, groups, digits = (np.zeros(n, np.uint8) for _ in range(9))
+    for c, inside in _columns(end, size, data, width):
+        d = c - np.uint8(48)
+        dig = d < 10
+        com, dot = c == 44, c == 46
+        total *= dig * np.uint8(9) + np.uint8(1)
+        total += d * dig
+        upto_c += dig & (ncom == 0)  # dígitos antes da 1ª vírgula
+        upto_d += dig & (ndot == 0)  # dígitos antes do 1º ponto
+        last += (c - last) * (com | dot)
+        # grupos de milhar: resto por 4 da posição (entre dígitos e separadores) de cada um
+        bit = np.left_shift(np.uint8(1), kept & np.uint8(3))
+        groups |= bit * (dot if thousands == "." else com)
+        digits |= bit * dig
+        kept += dig | com | dot
+        if thousands == ",":
+            stray |= inside & ~(dig | com | dot) & ~_skipped(c, skip)
+        ndig += dig
+        ncom += com
+        ndot += dot
+    slow = (size > width) | (ndig > _MAX_DIGITS["count"])
+    if thousands == ".":  # to_count: '1.234.567' é milhar
+        whole = _grouped(groups, digits, kept) & (ncom == 0)
+    else:
+        # '1.234' só é milhar (como em to_count) se a célula não for um en-US válido
+        one_dot = (ncom == 0) & (ndot == 1)
+        whole = one_dot & (upto_d >= 1) & (upto_d <= 3) & (ndig - upto_d == 3) & stray
+        whole |= _grouped(groups, digits, kept) & (ndot == 0) & ~stray
+        slow |= (ncom == 0) & (ndot > 1)
+    comma_cut = (ncom > 0) & ((ndot == 0) | (last == 44)) & ~whole
+    dot_cut = (ndot > 0) & ~comma_cut & ~whole
+    drop = ndig - np.where(comma_cut, upto_c, np.where(dot_cut, upto_d, ndig))  # dígitos cortados
+    cut = np.flatnonzero(drop)
+    total[cut] //= _POW10_INT[np.minimum(drop[cut], _MAX_DIGITS["count"])]
+    total[null] = 0
+    return total, slow & ~null
+
+def _blocked(scan, s: pd.Series, *args):
+    """`scan` em blocos de _SCAN_BLOCK linhas, juntando (valores, células lentas)."""
+    if len(s) <= _SCAN_BLOCK:
+        return scan(s, *args)
+    parts = [scan(s.iloc[i:i + _SCAN_BLOCK], *args) for i in range(0, len(s), _SCAN_BLOCK)]
+    return np.concatenate([p[0] for p in parts]), np.concatenate([p[1] for p in parts])
+
+def col_to_number(col: pd.Series) -> pd.Series:
+    """to_number vetorizado (coluna inteira de uma vez)."""
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return col.astype("float64")
+    s = _as_text(col)
+    out, slow = _blocked(_scan_number, s)
+    rows = np.flatnonzero(slow)
+    if len(rows):  # moeda e NBSP saem na mesma ordem de to_number e a varredura tenta de novo
+        sub = s.iloc[rows].str.replace(_MONEY, "", regex=True).str.replace("\u00A0", " ", regex=False)
+        out[rows], again = _blocked(_scan_number, sub)
+        rows = rows[again]
+    if len(rows):
+        out[rows] = s.iloc[rows].map(to_number).to_numpy("float64")
+    return pd.Series(out, index=col.index, name=col.name)
+
+def col_to_count(col: pd.Series) -> pd.Series:
+    """to_count vetorizado (coluna inteira de uma vez); acima do int64, o maior int64."""
+    if pd.api.types.is_integer_dtype(col):
+        return col.abs().fillna(0).astype("int64")
+    s = _as_text(col)
+    out, slow = _blocked(_scan_count, s)
+    rows = np.flatnonzero(slow)
+    if len(rows):
+        out[rows] = [min(to_count(v), _INT64_MAX) for v in s.iloc[rows]]
+    return pd.Series(out, index=col.index, name=col.name)
+
+# inferência por coluna: uma amostra decide o separador decimal da coluna inteira
+COL_KINDS = {  # coluna convertida -> (chave do map_cols, tipo)
+    "_sol":  ("solicitacoes", "count"),
+    "_cli":  ("cliques", "count"),
+    "_imp":  ("impressoes", "count"),
+    "_ctr":  ("ctr", "number"),
+    "_taxa": ("taxa", "number"),
+    "_cpc":  ("cpc", "number"),
+    "_rec":  ("receita", "number"),
+}
+_JUNK_TOKENS = ("US$", "R$", "%", " ", "\u00A0")
+_LOOKS_PT = re.compile(r"^\d{1,3}(\.\d{3})+(,\d+)?$|^\d+,\d+$")
+_LOOKS_EN = re.compile(r"^\d{1,3}(,\d{3})+(\.\d+)?$|^\d+\.\d+$")
+_AMBIGUOUS = re.compile(r"^\d{1,3}[.,]\d{3}$")
+_VALID = {  # células que o caminho rápido aceita, por locale e tipo
+    ("pt", "number"): r"-?(\d{1,3}(\.\d{3})+|\d+)(,\d+)?",
+    ("en", "number"): r"-?(\d{1,3}(,\d{3})+|\d+)(\.\d+)?",
+    (None, "number"): r"-?\d+",
+    ("pt", "count"):  r"(\d{1,3}(\.\d{3})+|\d+)(,\d+)?",
+    ("en", "count"):  r"(\d{1,3}(,\d{3})+|\d+)(\.\d+)?",
+    (None, "count"):  r"\d+",
+}
+
+def _sample(col: pd.Series, n: int) -> list:
+    """Até n valores não vazios, espalhados pela coluna (determinístico)."""
+    vals = col.dropna()
+    if len(vals) > n:
+        step = len(vals) / n
+        vals = vals.iloc[[int(i * step) for i in range(n)]]
+    return [str(v) for v in vals]
+
+def infer_format(col: pd.Series, kind: str, n: int = 1000):
+    """Decide (locale, tokens) da coluna: 'pt' (vírgula decimal), 'en' ou None (sem evidência)."""
+    sample = _sample(col, n)
+    tokens = tuple(tk for tk in _JUNK_TOKENS if any(tk in v for v in sample))
+    pt = en = 0
+    for v in sample:
+        for tk in tokens:
+            v = v.replace(tk, "")
+        v = v.strip().lstrip("-")
+        if _AMBIGUOUS.match(v):
+            if kind == "count":  # contagem: grupo de 3 dígitos é milhar
+                pt += "." in v
+                en += "," in v
+        elif _LOOKS_PT.match(v):
+            pt += 1
+        elif _LOOKS_EN.match(v):
+            en += 1
+    locale = "pt" if pt > en else "en" if en > pt else None
+    return locale, tokens
+
+def _parse_rest(col: pd.Series, locale, tokens, kind: str) -> np.ndarray:
+    """Células que a varredura deixou: as válidas no locale (regex, sem os tokens inferidos)
+    seguem o locale; o resto vai para col_to_*."""
+    s = _as_text(col)
+    for tk in tokens:
+        s = s.str.replace(tk, "", regex=False)
+    valid = s.str.fullmatch(_VALID[locale, kind]).fillna(False).astype(bool)
+    if kind == "count":  # pt e sem locale já são as regras de to_count
+        if locale == "en" and _any(valid):
+            s = s.copy()
+            s[valid] = s[valid].str.replace(",", "", regex=False).str.replace(r"\..*", "", regex=True)
+        return col_to_count(s).to_numpy()
+    out = col_to_number(col).to_numpy(copy=True)
+    if locale and _any(valid):
+        v = s[valid]
+        if locale == "pt":
+            v = v.str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        else:
+            v = v.str.replace(",", "", regex=False)
+        out[valid.to_numpy()] = v.astype("float64[pyarrow]").to_numpy("float64")
+    return out
+
+def parse_col(col: pd.Series, kind: str):
+    """Converte a coluna com o formato inferido; só células fora do padrão vão para col_to_*.
+
+    Retorna (série convertida, locale inferido)."""
+    if pd.api.types.is_numeric_dtype(col) and not pd.api.types.is_bool_dtype(col):
+        return (col_to_count if kind == "count" else col_to_number)(col), None
+    locale, tokens = infer_format(col, kind)
+    s = _as_text(col)
+    if kind == "count" and locale != "en":  # to_count ignora tudo que não é dígito, ',' ou '.'
+        out, slow = _blocked(_scan_count, s)
+    else:
+        # espaço e '%' a varredura já ignora; os outros tokens saem antes
+        for tk in tokens:
+            if len(tk.encode()) > 1:
+                s = s.str.replace(tk, "", regex=False)
+        skip = "".join(tk for tk in tokens if len(tk.encode()) == 1)
+        thousands = {"pt": ".", "en": ","}.get(locale)
+        if kind == "count":
+            out, slow = _blocked(_scan_count, s, thousands, skip)
+        else:
+            out, slow = _blocked(_scan_number, s, thousands, skip)
+    rest = np.flatnonzero(slow)
+    if len(rest):
+        out[rest] = _parse_rest(col.iloc[rest], locale, tokens, kind)
+    return pd.Series(out, index=col.index, name=col.name), locale
+
+def convert_mapped(df, m, cols):
+    """Cria as colunas _sol/_cli/... a partir do mapeamento; retorna o locale de cada uma."""
+    locales = {}
+    for out in cols:
+        key, kind = COL_KINDS[out]
+        if m[key]:
+            df[out], locales[out] = parse_col(df[m[key]], kind)
+    return locales
+
+_HEADER_KEYS = (
+    "bloco de anúncios","bloco de anuncios",
+    "cliques do ad exchange","ctr do ad exchange",
+    "taxa de correspondência","taxa de correspondencia",
+    "solicitações de anúncios","solicitacoes de anuncios",
+    "impressões do ad exchange","receita do ad exchange",
+    "cpc do ad exchange","ecpm medio do ad exchange"
+)
+
+def detect_header_and_sep(raw: str):
+    """Identifica linha de cabeçalho real e separador (; , \t)."""
+    lines = list(islice((ln for ln in raw.splitlines() if ln.strip()), 60))
+    header_idx = 0
+    for i, ln in enumerate(lines[:60]):
+        ln_norm = unicodedata.normalize("NFKD", ln).lower()
+        if sum(1 for k in _HEADER_KEYS if k in ln_norm) >= 2:
+            header_idx = i
+            break
+    best_sep, max_cols = ";", 0
+    for sep in [";", ",", "\t"]:
+        ncols = len(lines[header_idx].split(sep))
+        if ncols > max_cols:
+            best_sep, max_cols = sep, ncols
+    return header_idx, best_sep
+
+PEEK_BYTES = 64 * 1024  # o cabeçalho do GAM cabe com folga nas primeiras linhas
+
+def compression(file):
+    """"gzip", "zip" ou None, pelos bytes mágicos do início do arquivo."""
+    file.seek(0)
+    magic = file.read(4)
+    file.seek(0)
+    if magic[:2] == b"\x1f\x8b":
+        return "gzip"
+    return "zip" if magic == b"PK\x03\x04" else None
+
+def _zip_member(zf):
+    names = [i.filename for i in zf.infolist() if not i.is_dir() and not i.filename.startswith("__MACOSX/")]
+    csvs = [n for n in names if n.lower().endswith(".csv")]
+    if not (csvs or names):
+        raise ValueError("ZIP sem arquivos")
+    return (csvs or names)[0]
+
+@contextmanager
+def report_stream(file):
+    """O CSV desde o início; .gz/.zip são descompactados em fluxo, sem cópia em memória."""
+    kind = compression(file)
+    try:
+        if kind == "gzip":
+            with gzip.GzipFile(fileobj=file, mode="rb") as f:
+                yield f
+        elif kind == "zip":
+            with zipfile.ZipFile(file) as zf, zf.open(_zip_member(zf)) as f:
+                yield f
+        else:
+            yield file
+    finally:
+        file.seek(0)
+
+def peek_text(file, nbytes=PEEK_BYTES) -> str:
+    """Primeiros KB do CSV como texto (sem a última linha, que pode vir cortada)."""
+    with report_stream(file) as f:
+        head = f.read(nbytes)
+    text = head.decode("utf-8-sig", errors="ignore")
+    if len(head) == nbytes and "\n" in text:
+        text = text[: text.rfind("\n") + 1]
+    return text
+
+_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b|\b(\d{4})-(\d{2})-(\d{2})\b")
+
+def report_date(raw: str):
+    """Última data do preâmbulo antes do cabeçalho (ex.: "Período: 01/10/2026 - 07/10/2026")."""
+    known = _known_header(raw)
+    h = known[1] if known else detect_header_and_sep(raw)[0]
+    pre = "\n".join(islice((ln for ln in raw.splitlines() if ln.strip()), h))
+    found = None
+    for m in _DATE_RE.finditer(pre):
+        d, mo, y = (m[1], m[2], m[3]) if m[1] else (m[6], m[5], m[4])
+        try:
+            found = date(int(y), int(mo), int(d))
+        except ValueError:
+            pass
+    return found
+
+def _header_row(raw: str, h: int):
+    """Índice físico (contando linhas em branco) e texto da h-ésima linha não vazia."""
+    seen = -1
+    for i, ln in enumerate(raw.splitlines()):
+        if ln.strip():
+            seen += 1
+            if seen == h:
+                return i, ln
+    return 0, ""
+
+# Modelos de cabeçalho já vistos: hash da linha do cabeçalho -> separador e mapeamento.
+# Guardados em data_dir()/cabecalhos.json; a versão invalida o arquivo quando map_cols muda.
+HEADER_CACHE_VERSION = 1
+_header_cache = None
+_header_lock = threading.Lock()
+
+def _header_key(line: str) -> str:
+    return hashlib.blake2b(line.strip().encode("utf-8"), digest_size=16).hexdigest()
+
+def _cache_path():
+    return data_dir() / "cabecalhos.json"
+
+def _templates():
+    """Modelos conhecidos, lidos do disco uma vez por processo."""
+    global _header_cache
+    if _header_cache is None:
+        try:
+            saved = json.loads(_cache_path().read_text(encoding="utf-8"))
+            ok = saved.get("versao") == HEADER_CACHE_VERSION
+            _header_cache = saved.get("modelos", {}) if ok else {}
+        except (OSError, ValueError, AttributeError):
+            _header_cache = {}
+    return _header_cache
+
+def _remember_header(line, sep, m):
+    """Grava o modelo (escrita atômica); disco só-leitura apenas desliga o cache."""
+    with _header_lock:
+        templates = _templates()
+        templates[_header_key(line)] = {"sep": sep, "map": m}
+        try:
+            path = _cache_path()  # data_dir() cria o diretório: também pode falhar
+            tmp = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps({"versao": HEADER_CACHE_VERSION, "modelos": templates},
+                                      ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)
+        except OSError:
+            pass
+
+def _known_header(raw: str):
+    """(linha física, índice entre não vazias, linha, modelo) do primeiro cabeçalho já visto."""
+    templates = _templates()
+    if not templates:
+        return None
+    h = -1
+    for i, ln in enumerate(raw.splitlines()):
+        if not ln.strip():
+            continue
+        h += 1
+        if h >= 60:
+            break
+        hit = templates.get(_header_key(ln))
+        if hit:
+            return i, h, ln, hit
+    return None
+
+def locate_header(file):
+    """(linha física do cabeçalho, índice entre linhas não vazias, separador, nomes das colunas)."""
+    return mapped_header(file)[0]
+
+def mapped_header(file):
+    """(cabeçalho como em locate_header, mapeamento de map_cols).
+
+    Cabeçalhos já vistos vêm do cache em disco, sem varrer o preâmbulo nem normalizar
+    nomes; os novos passam pela detecção de sempre e, se têm a coluna de bloco, são gravados."""
+    head = peek_text(file)
+    known = _known_header(head)
+    if known:
+        skip, h, line, hit = known
+        sep = hit["sep"]
+        return (skip, h, sep, next(csv.reader([line], delimiter=sep), [])), dict(hit["map"])
+    h, sep = detect_header_and_sep(head)
+    skip, line = _header_row(head, h)
+    names = next(csv.reader([line], delimiter=sep), [])
+    m = map_cols(pd.DataFrame(columns=names))
+    if m["bloco"]:
+        _remember_header(line, sep, m)
+    return (skip, h, sep, names), m
+
+def _read_table(file, header, usecols=None, categories=()):
+    skip, h, sep, names = header
+    types = {n: pa.dictionary(pa.int32(), pa.string()) if n in categories else pa.string() for n in names}
+    try:
+        with report_stream(file) as f:
+            table = pacsv.read_csv(
+                f,
+                read_options=pacsv.ReadOptions(skip_rows=skip),
+                parse_options=pacsv.ParseOptions(delimiter=sep),
+                convert_options=pacsv.ConvertOptions(
+                    column_types=types, include_columns=usecols, strings_can_be_null=True
+                ),
+            )
+    except (pa.ArrowInvalid, pa.ArrowKeyError):
+        # linhas irregulares / encoding inválido: parser do pandas, mais tolerante
+        with report_stream(file) as f:
+            return pd.read_csv(f, sep=sep, header=h, usecols=usecols,
+                               dtype={c: "category" for c in categories},
+                               encoding="utf-8-sig", encoding_errors="ignore")
+    return table.to_pandas(types_mapper={pa.string(): pd.StringDtype("pyarrow")}.get)
+
+def read_gam_csv(file):
+    """Lê o CSV direto do buffer de bytes (sem decodificar/copiar o arquivo inteiro; .gz/.zip em fluxo)."""
+    return _read_table(file, locate_header(file))
+
+def find_col(df, parts):
+    for col in df.columns:
+        if all(p in normalize_text(col) for p in parts):
+            return col
+    return None
+
+def map_cols(df):
+    """Mapeia colunas importantes (algumas podem não existir no P2)."""
+    return {
+        "bloco":        find_col(df, ["bloco","anuncios"]) or find_col(df, ["bloco","anuncio"]),
+        "solicitacoes": find_col(df, ["solicitacoes"]),
+        "cliques":      find_col(df, ["cliques"]),
+        "ctr":          find_col(df, ["ctr"]),  # opcional no P2
+        "taxa":         find_col(df, ["taxa","correspondencia"]),
+        "cpc":          find_col(df, ["cpc"]),  # opcional no P2
+        "impressoes":   find_col(df, ["impressoes"]),
+        "receita":      find_col(df, ["receita"]),
+    }
+
+def load_report(file, cols, records=None):
+    """Lê só as colunas mapeadas: bloco categórico e _sol/_cli/... já convertidos.
+
+    Retorna (df, mapeamento, locale por coluna, índice de blocos). Com `records` (lista),
+    registra tempo e pico de memória de cada etapa (ver adops.profiling)."""
+    with maybe_stage(records, "cabecalho"):
+        header, m = mapped_header(file)
+        names = header[3]
+    keep = [c for c in dict.fromkeys([names[0] if names else None, m["bloco"]]) if c]
+    raw = [m[COL_KINDS[c][0]] for c in cols if m[COL_KINDS[c][0]]]
+    with maybe_stage(records, "leitura_csv"):
+        df = _read_table(file, header, usecols=list(dict.fromkeys(keep + raw)), categories=keep)
+    if records is not None:
+        records[-1].update(linhas=len(df), colunas=len(names), compressao=compression(file))
+    with maybe_stage(records, "conversao"):
+        fmt = convert_mapped(df, m, cols)
+        for c in fmt:
+            if df[c].dtype.kind == "i":
+                df[c] = pd.to_numeric(df[c], downcast="integer")
+        df = df.drop(columns=[c for c in raw if c not in keep])
+    with maybe_stage(records, "indice_blocos"):
+        units = build_unit_index(df, m["bloco"])
+    return df, m, fmt, units
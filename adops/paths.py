@@ -0,0 +1,8 @@
+"""Onde o IAdops guarda dados locais (histórico, caches): $ADOPS_HOME ou ~/.adops."""
+import os
+from pathlib import Path
+
+def data_dir() -> Path:
+    path = Path(os.environ.get("ADOPS_HOME") or Path.home() / ".adops")
+    path.mkdir(parents=True, exist_ok=True)
+    return path
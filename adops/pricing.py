@@ -0,0 +1,193 @@
+"""Fórmulas de precificação (P1: Perda / CPC Alvo; P2: Perda de Usuário / CPC Corrigido).
+
+Todas aceitam escalares ou colunas inteiras (NumPy/pandas)."""
+import numpy as np
+import pandas as pd
+
+from adops.units import INTER_TOKENS, REWARDED_TOKENS, first_row, get_row, get_total_or_sum
+
+# colunas convertidas na leitura e colunas obrigatórias de cada relatório
+P1_COLS = ("_sol", "_cli", "_ctr", "_taxa", "_cpc")
+P2_COLS = ("_sol", "_cli", "_imp", "_taxa", "_rec", "_cpc", "_ctr")
+P1_NEED = ("bloco", "solicitacoes", "cliques", "ctr", "taxa", "cpc")
+P2_NEED = ("bloco", "solicitacoes", "cliques", "impressoes", "taxa", "receita")  # cpc/ctr opcionais
+
+def missing_cols(m, need):
+    """Colunas obrigatórias que o mapeamento não encontrou."""
+    return [k for k in need if not m[k]]
+
+def calc_perda(solicitacoes, cliques):
+    """Perda (P1) = (Solicitações − Cliques P1+P2) ÷ Solicitações; mínimo 0, e 0 sem solicitações."""
+    sol = np.asarray(solicitacoes, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        perda = np.where(sol > 0, (sol - cliques) / sol, 0.0)
+    return np.maximum(perda, 0.0)
+
+def calc_cpc_alvo(cpa, roas, perda):
+    """CPC Alvo = CPA × ROAS (%) × (1 + Perda)."""
+    return cpa * (roas / 100.0) * (1.0 + perda)
+
+def calc_perda_usuario(solicitacoes, cobertura, impressoes):
+    """Perda de Usuário = (Solicitações × Cobertura %) − Impressões; mínimo 0."""
+    sol = np.asarray(solicitacoes, dtype="float64")
+    return np.maximum(sol * (np.asarray(cobertura, dtype="float64") / 100.0) - impressoes, 0.0)
+
+def calc_cpc_corrigido(receita, cliques, perda_usuario):
+    """CPC Corrigido = Receita ÷ (Cliques + Perda de Usuário); NaN se o denominador for 0."""
+    denom = np.asarray(cliques, dtype="float64") + perda_usuario
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(denom > 0, receita / denom, float("nan"))
+
+# faixas do Cálculo de Variação: rótulo -> (variação mínima, máxima)
+VARIACOES = {
+    "Leve (5%–10%)": (0.05, 0.10),
+    "Média (10%–20%)": (0.10, 0.20),
+    "Agressiva (20%–30%)": (0.20, 0.30),
+}
+
+def variation_bands(valores, direcao="Aumentar"):
+    """De/Até de cada faixa de VARIACOES para cada valor: dois arrays (..., nº de faixas)."""
+    sign = 1.0 if direcao == "Aumentar" else -1.0
+    lo, hi = np.array(list(VARIACOES.values())).T
+    v = np.asarray(valores, dtype="float64")[..., None]
+    return v * (1.0 + sign * lo), v * (1.0 + sign * hi)
+
+MAX_SCENARIOS = 1_000_000  # células da grade (a tabela longa tem 3 linhas por célula)
+
+def frange_len(start, stop, step):
+    """Quantos valores frange(start, stop, step) teria, sem criar o array."""
+    if step <= 0 or stop < start:
+        return 1
+    return int(np.floor((stop - start) / step + 1e-9)) + 1
+
+def frange(start, stop, step):
+    """start, start+step, ... até stop (inclusive, tolerando erro de ponto flutuante)."""
+    if step <= 0 or stop < start:
+        return np.array([float(start)])
+    return np.round(start + step * np.arange(frange_len(start, stop, step)), 10)
+
+def sweep_table(grid, label, valores, direcao="Aumentar"):
+    """Tabela longa com uma linha por cenário × faixa de variação.
+
+    grid: {nome do eixo: array em broadcast com valores}; valores: resultado de cada cenário."""
+    valores = np.asarray(valores, dtype="float64")
+    k = len(VARIACOES)
+    de, ate = variation_bands(valores.ravel(), direcao)
+    cols = {name: np.repeat(np.broadcast_to(a, valores.shape).ravel(), k) for name, a in grid.items()}
+    cols[label] = np.repeat(valores.ravel(), k)
+    cols["Variação"] = pd.Categorical.from_codes(np.tile(np.arange(k, dtype=np.int8), valores.size), list(VARIACOES))
+    cols["De"], cols["Até"] = de.ravel(), ate.ravel()
+    return pd.DataFrame(cols)
+
+def sweep_cpc_alvo(cpas, roases, perda):
+    """CPC Alvo de toda a grade CPA × ROAS de uma vez: array (nº de CPAs, nº de ROAS)."""
+    return calc_cpc_alvo(np.asarray(cpas, dtype="float64")[:, None], np.asarray(roases, dtype="float64")[None, :], perda)
+
+def sweep_cpc_corrigido(solicitacoes, coberturas, impressoes, receitas, cliques):
+    """CPC Corrigido da grade Cobertura × Receita: array (nº de coberturas, nº de receitas)."""
+    perda_u = calc_perda_usuario(solicitacoes, np.asarray(coberturas, dtype="float64"), impressoes)
+    return calc_cpc_corrigido(np.asarray(receitas, dtype="float64")[None, :], cliques, perda_u[:, None])
+
+def _status(atual, ref, bom, abaixo):
+    atual, ref = np.asarray(atual, dtype="float64"), np.asarray(ref, dtype="float64")
+    return np.where(np.isnan(atual) | np.isnan(ref), "—", np.where(atual >= ref, bom, abaixo))
+
+def _body(df, units, col_bloco):
+    """Linhas de blocos (sem a Total), o nome de cada bloco e a categoria de cada linha."""
+    keep = np.asarray(units["categoria"] != "total")
+    body = df[keep]
+    return body, body[col_bloco].astype(str), np.asarray(units["categoria"].astype(str))[keep]
+
+def unit_clicks(df, units, col_bloco):
+    """Cliques por nome de bloco (soma das linhas repetidas, sem a linha Total)."""
+    body, bloco, _ = _body(df, units, col_bloco)
+    return body["_cli"].groupby(bloco, sort=False).sum()
+
+def price_units_p1(df, units, col_bloco, cliques_p2, cpa, roas):
+    """Perda / CPC Alvo / status de todos os blocos do P1 de uma vez (sem a linha Total).
+
+    Uma linha por nome de bloco: linhas repetidas somam solicitações e cliques e o CPC
+    atual é ponderado por solicitações. A Perda usa os cliques do próprio bloco: os do P1
+    mais os do bloco de mesmo nome na P2 (`cliques_p2`, de unit_clicks; None = sem P2)."""
+    body, bloco, categoria = _body(df, units, col_bloco)
+    sol = body["_sol"].astype("float64").fillna(0.0)
+    cpc = body["_cpc"].astype("float64")
+    w = sol.where(cpc.notna() & (sol > 0), 0.0)
+    by = pd.DataFrame({
+        "sol": sol, "cli": body["_cli"].astype("float64").fillna(0.0), "cw": (cpc * w).fillna(0.0), "w": w,
+        "categoria": categoria,
+    }, index=body.index).groupby(bloco, sort=False)
+    g = by[["sol", "cli", "cw", "w"]].sum()
+    cliques = g["cli"].to_numpy()
+    if cliques_p2 is not None:
+        cliques = cliques + cliques_p2.reindex(g.index).fillna(0).to_numpy("float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cpc_atual = np.where(g["w"] > 0, g["cw"] / g["w"], np.nan)
+    perda = calc_perda(g["sol"], cliques)
+    alvo = calc_cpc_alvo(cpa, roas, perda)
+    return pd.DataFrame({
+        "Bloco": g.index.to_numpy(object),
+        "Categoria": by["categoria"].first().to_numpy(),
+        "Solicitações": g["sol"].to_numpy(),
+        "Cliques P1+P2": cliques,
+        "CPC atual": cpc_atual,
+        "Perda (%)": perda * 100.0,
+        "CPC Alvo": alvo,
+        "Status": _status(cpc_atual, alvo, "Bom (≥ alvo)", "Abaixo do alvo"),
+    })
+
+def price_units_p2(df, units, col_bloco, cpc_ref):
+    """Perda de Usuário / CPC Corrigido / status de todos os blocos da P2 de uma vez."""
+    perda_u = calc_perda_usuario(df["_sol"], df["_taxa"], df["_imp"])
+    corrigido = calc_cpc_corrigido(df["_rec"], df["_cli"], perda_u)
+    out = pd.DataFrame({
+        "Bloco": df[col_bloco].astype(str),
+        "Categoria": units["categoria"],
+        "Solicitações": df["_sol"],
+        "Cliques": df["_cli"],
+        "Impressões": df["_imp"],
+        "Cobertura (%)": df["_taxa"],
+        "Receita": df["_rec"],
+        "Perda de Usuário": perda_u,
+        "CPC Corrigido": corrigido,
+        "Status": _status(corrigido, cpc_ref, "Bom (corrigido ≥ mob_top)", "Abaixo (corrigido < mob_top)"),
+    })
+    return out[out["Categoria"] != "total"]
+
+def _val(row, col):
+    if row is None or col not in row.index or pd.isna(row[col]):
+        return float("nan")
+    return float(row[col])
+
+def summarize_pair(p1, u1, p2, u2, cpa, roas):
+    """Resultado de um par P1/P2 numa linha (os mesmos números dos cards da página)."""
+    inter, _ = first_row(p1, u1, INTER_TOKENS)
+    mob1 = get_row(p1, u1, "mob_top")
+    mob2 = get_row(p2, u2, "mob_top")
+    rewarded, rewarded_name = first_row(p2, u2, REWARDED_TOKENS)
+    cli1 = int(get_total_or_sum(p1, u1, "_cli"))
+    cli2 = int(get_total_or_sum(p2, u2, "_cli"))
+    sol_i = int(inter["_sol"]) if inter is not None else 0
+    perda = float(calc_perda(sol_i, cli1 + cli2))
+    alvo = float(calc_cpc_alvo(cpa, roas, perda))
+    cpc_i, cpc_mob1, cpc_mob2 = _val(inter, "_cpc"), _val(mob1, "_cpc"), _val(mob2, "_cpc")
+    perda_u = corrigido = float("nan")
+    if rewarded is not None:
+        perda_u = float(calc_perda_usuario(rewarded["_sol"], rewarded["_taxa"], rewarded["_imp"]))
+        corrigido = float(calc_cpc_corrigido(rewarded["_rec"], rewarded["_cli"], perda_u))
+    return {
+        "Solicitações (Interstitial/Offerwall)": sol_i,
+        "Cliques P1 (Total)": cli1,
+        "Cliques P2 (Total)": cli2,
+        "Perda (P1)": perda,
+        "CPC Alvo (P1)": alvo,
+        "CPC Atual (Interstitial)": cpc_i,
+        "Status Interstitial": str(_status(cpc_i, alvo, "Bom (≥ alvo)", "Abaixo do alvo")),
+        "CPC Atual (mob_top P1)": cpc_mob1,
+        "Status mob_top": str(_status(cpc_mob1, alvo, "Bom (≥ alvo)", "Abaixo do alvo")),
+        "Bloco P2": rewarded_name or "—",
+        "Perda de Usuário": perda_u,
+        "CPC Corrigido": corrigido,
+        "CPC Atual (mob_top P2)": cpc_mob2,
+        "Status P2": str(_status(corrigido, cpc_mob2, "Bom (corrigido ≥ mob_top)", "Abaixo (corrigido < mob_top)")),
+    }
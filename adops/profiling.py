@@ -0,0 +1,91 @@
+"""Medição de etapas: tempo de parede e pico de memória de cada bloco medido."""
+import json
+import logging
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+import pyarrow as pa
+
+logger = logging.getLogger("adops")
+
+_lock = threading.Lock()
+_open = {}  # etapas em andamento: id -> {"py": pico do tracemalloc visto até agora, ...}
+_own_trace = False  # o tracemalloc foi ligado aqui (e é desligado quando a última etapa fecha)
+
+def _fold():
+    """Leva o pico atual do tracemalloc a todas as etapas abertas e zera o pico (com _lock)."""
+    peak = tracemalloc.get_traced_memory()[1]
+    for m in _open.values():
+        m["py"] = max(m["py"], peak)
+    tracemalloc.reset_peak()
+
+@contextmanager
+def stage(records, name, memory=True):
+    """Mede o bloco e acrescenta {"etapa", "segundos", "pico_mb"} em records.
+
+    Com memory=False, só o tempo (pico_mb None): o tracemalloc deixa o Python bem mais lento.
+    pico_mb soma o pico do tracemalloc (Python e NumPy) acima do início com o do pool de
+    memória do Arrow: contagens de alocação, não amostras, então memória reaproveitada pelo
+    alocador também conta. Etapas simultâneas (P1 e P2 em paralelo) incluem uma a outra."""
+    global _own_trace
+    if not memory:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            records.append({"etapa": name, "segundos": time.perf_counter() - t0, "pico_mb": None})
+        return
+    pool = pa.default_memory_pool()
+    with _lock:
+        if not _open and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _own_trace = True
+        _fold()
+        m = {"py": 0, "py0": tracemalloc.get_traced_memory()[0],
+             "arrow0": pool.bytes_allocated(), "total0": pool.total_bytes_allocated()}
+        _open[id(m)] = m
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        secs = time.perf_counter() - t0
+        with _lock:
+            _fold()
+            del _open[id(m)]
+            if not _open and _own_trace:
+                tracemalloc.stop()
+                _own_trace = False
+        # max_memory() é o pico da vida do processo: só vale para a etapa quando ela o renovou;
+        # senão o pico do Arrow fica limitado pelo total que a etapa alocou
+        arrow = min(pool.total_bytes_allocated() - m["total0"], pool.max_memory() - m["arrow0"])
+        records.append({
+            "etapa": name,
+            "segundos": secs,
+            "pico_mb": (max(arrow, 0) + max(m["py"] - m["py0"], 0)) / 2**20,
+        })
+
+def maybe_stage(records, name):
+    """stage() quando há onde registrar; sem custo nenhum quando records é None."""
+    return stage(records, name) if records is not None else nullcontext()
+
+def checkpoints(records):
+    """mark(nome) fecha a etapa em andamento e abre a próxima; mark() só fecha.
+
+    Para scripts lineares (páginas), onde envolver cada trecho num `with` não cabe."""
+    current = [None]
+
+    def mark(name=None):
+        if current[0] is not None:
+            current[0].__exit__(None, None, None)
+        current[0] = stage(records, name) if name else None
+        if current[0] is not None:
+            current[0].__enter__()
+
+    return mark
+
+def log_records(records, **context):
+    """Uma linha JSON por etapa no logger "adops" (nível INFO)."""
+    for r in records:
+        logger.info(json.dumps({**context, **r}, ensure_ascii=False, default=str))
@@ -0,0 +1,86 @@
+"""Precificação de regras em lote: uma planilha de entradas -> P1/P2 de todas as linhas.
+
+As colunas são reconhecidas pelo nome (com tolerância a acentos, ordem e erros de digitação)
+e os números passam pela mesma conversão pt-BR/en-US dos relatórios do GAM."""
+import difflib
+
+import numpy as np
+import pandas as pd
+
+from adops.parsing import normalize_text, parse_col, read_gam_csv
+from adops.pricing import calc_cpc_alvo, calc_cpc_corrigido, calc_perda, calc_perda_usuario
+
+# campo -> (rótulo, tipo, alternativas de partes do nome normalizado)
+RULE_FIELDS = {
+    "P1": {
+        "solicitacoes": ("Solicitações", "count", [["solicitacoes"], ["solicitacao"], ["requests"]]),
+        "cliques_p1": ("Cliques P1", "count", [["cliques", "p1"], ["clicks", "p1"]]),
+        "cliques_p2": ("Cliques P2", "count", [["cliques", "p2"], ["clicks", "p2"]]),
+        "cpa": ("CPA", "number", [["cpa"]]),
+        "roas": ("ROAS (%)", "number", [["roas"]]),
+    },
+    "P2": {
+        "solicitacoes": ("Solicitações", "count", [["solicitacoes"], ["solicitacao"], ["requests"]]),
+        "cobertura": ("Cobertura (%)", "number", [["cobertura"], ["taxa"], ["coverage"], ["match", "rate"]]),
+        "impressoes": ("Impressões", "count", [["impressoes"], ["impressao"], ["impressions"]]),
+        "receita": ("Receita", "number", [["receita"], ["revenue"]]),
+        "cliques": ("Cliques", "count", [["cliques"], ["clicks"]]),
+    },
+}
+
+def _fuzzy(field, columns, taken):
+    """Coluna com nome parecido com o campo (ex.: "solicitacos", "cliques_p_1")."""
+    norm = {normalize_text(c).replace("_", ""): c for c in columns if c not in taken}
+    hit = difflib.get_close_matches(field.replace("_", ""), list(norm), n=1, cutoff=0.8)
+    return norm[hit[0]] if hit else None
+
+def match_columns(columns, kind):
+    """{campo: coluna da planilha ou None}; cada coluna é usada por um campo só."""
+    out, taken = {}, set()
+    for field, (_, _, alternatives) in RULE_FIELDS[kind].items():
+        found = next(
+            (c for parts in alternatives for c in columns
+             if c not in taken and all(p in normalize_text(c) for p in parts)),
+            None,
+        ) or _fuzzy(field, columns, taken)
+        out[field] = found
+        taken.add(found)
+    return out
+
+def read_rules(file):
+    """Planilha (CSV, .csv.gz ou .zip) com todas as colunas como texto."""
+    return read_gam_csv(file)
+
+def _inputs(df, mapping, kind):
+    cols = {}
+    for field, (_, typ, _) in RULE_FIELDS[kind].items():
+        src = mapping.get(field)
+        cols[field] = parse_col(df[src], typ)[0] if src else pd.Series(np.nan, index=df.index)
+    return cols
+
+def price_rules_p1(df, mapping):
+    """Perda / CPC Alvo de todas as regras; Status aponta a linha que não pôde ser calculada."""
+    x = _inputs(df, mapping, "P1")
+    perda = calc_perda(x["solicitacoes"], x["cliques_p1"] + x["cliques_p2"])
+    alvo = calc_cpc_alvo(x["cpa"], x["roas"], perda)
+    sem_sol = ~(x["solicitacoes"] > 0)
+    sem_meta = x["cpa"].isna() | x["roas"].isna()
+    out = df.copy()
+    out["Perda (%)"] = np.where(sem_sol, np.nan, perda * 100.0)
+    out["CPC Alvo"] = np.where(sem_sol | sem_meta, np.nan, alvo)
+    out["Status"] = np.select([sem_sol, sem_meta], ["Solicitações = 0", "CPA/ROAS ausente"], "ok")
+    return out
+
+def price_rules_p2(df, mapping):
+    """Perda de Usuário / CPC Corrigido de todas as regras; Status aponta denominador zero."""
+    x = _inputs(df, mapping, "P2")
+    perda_u = calc_perda_usuario(x["solicitacoes"], x["cobertura"], x["impressoes"])
+    corrigido = calc_cpc_corrigido(x["receita"], x["cliques"], perda_u)
+    out = df.copy()
+    out["Perda de Usuário"] = perda_u
+    out["CPC Corrigido"] = corrigido
+    out["Status"] = np.select(
+        [np.isnan(perda_u), ~(x["cliques"] + perda_u > 0), np.isnan(corrigido)],
+        ["Cobertura ausente", "Cliques + Perda de Usuário = 0", "Receita ausente"], "ok",
+    )
+    return out
@@ -0,0 +1,309 @@
+"""Serviço HTTP local de precificação para scripts (sem Streamlit): `python -m adops serve`.
+
+    POST /p1     {"solicitacoes", "cliques_p1", "cliques_p2", "cpa", "roas"}
+                 -> {"perda", "cpc_alvo"}
+    POST /p2     {"solicitacoes", "cobertura", "impressoes", "receita", "cliques"}
+                 -> {"perda_usuario", "cpc_corrigido"}
+    POST /lote?cpa=X&roas=Y   corpo = ZIP com site_P1.csv / site_P2.csv (também .csv.gz)
+                 ou multipart/form-data com esses arquivos; com &site=S, as partes "p1" e
+                 "p2" são os CSVs do site S (ex.: curl -F p1=@P1.csv -F p2=@P2.csv)
+                 -> uma linha por site, como `python -m adops price`
+    GET  /metrics   requisições, itens, lotes (requisições e itens por lote), latência p50/p95/p99
+                    e vazão por rota
+    GET  /health
+
+/p1 e /p2 aceitam um objeto, uma lista de objetos ou colunas ({"campo": [valores]}) e
+respondem no mesmo formato; valores sem resultado (ex.: denominador zero) vêm como null.
+
+Cálculos de muitas conexões simultâneas são agrupados (micro-lotes): uma thread por rota
+junta o que estiver na fila (até `max_batch` linhas, esperando no máximo `max_wait` s) e
+avalia tudo de uma vez com as fórmulas vetorizadas de adops.pricing. Relatórios vão para
+um pool de processos (adops.batch.price_pair)."""
+import json
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from email.message import Message
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from adops.batch import pair_reports, price_pair, zip_members
+from adops.pricing import calc_cpc_alvo, calc_cpc_corrigido, calc_perda, calc_perda_usuario
+
+logger = logging.getLogger("adops")
+
+MAX_BODY = 256 * 2**20  # maior corpo aceito (ZIP de relatórios)
+LATENCY_SAMPLES = 10_000  # janela das latências de cada rota em /metrics
+
+def _price_p1(x):
+    perda = calc_perda(x["solicitacoes"], x["cliques_p1"] + x["cliques_p2"])
+    return {"perda": perda, "cpc_alvo": calc_cpc_alvo(x["cpa"], x["roas"], perda)}
+
+def _price_p2(x):
+    perda_u = calc_perda_usuario(x["solicitacoes"], x["cobertura"], x["impressoes"])
+    return {"perda_usuario": perda_u, "cpc_corrigido": calc_cpc_corrigido(x["receita"], x["cliques"], perda_u)}
+
+# rota -> (campos de entrada, cálculo vetorizado sobre colunas)
+CALCS = {
+    "/p1": (("solicitacoes", "cliques_p1", "cliques_p2", "cpa", "roas"), _price_p1),
+    "/p2": (("solicitacoes", "cobertura", "impressoes", "receita", "cliques"), _price_p2),
+}
+
+def parse_payload(payload, fields):
+    """(colunas float64, formato da resposta); ValueError com a mensagem para o cliente."""
+    if isinstance(payload, dict) and any(isinstance(v, list) for v in payload.values()):
+        shape, get = "colunas", lambda f: payload[f]
+    elif isinstance(payload, dict):
+        shape, get = "objeto", lambda f: [payload[f]]
+    elif isinstance(payload, list) and all(isinstance(r, dict) for r in payload):
+        shape, get = "lista", lambda f: [r[f] for r in payload]
+    else:
+        raise ValueError("esperado um objeto, uma lista de objetos ou colunas")
+    cols = {}
+    for f in fields:
+        try:
+            values = get(f)
+        except KeyError:
+            raise ValueError(f"campo ausente: {f}") from None
+        # só números JSON: null, true/false e textos como "1" são recusados
+        if not isinstance(values, list) or any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in values):
+            raise ValueError(f"campo não numérico: {f}")
+        try:
+            cols[f] = np.asarray(values, dtype="float64")
+        except OverflowError:
+            raise ValueError(f"campo não numérico: {f}") from None
+    if len({len(c) for c in cols.values()}) > 1:
+        raise ValueError("colunas com tamanhos diferentes")
+    return cols, shape
+
+def form_reports(body, content_type, site=None):
+    """(nome, bytes) de cada arquivo de um corpo multipart/form-data.
+
+    Com `site`, os campos "p1"/"p2" viram site_P1.csv/site_P2.csv (o nome enviado não importa);
+    senão vale o nome do arquivo de cada parte, como num ZIP."""
+    header = Message()
+    header["Content-Type"] = content_type
+    boundary = header.get_param("boundary")
+    if not boundary:
+        raise ValueError("multipart/form-data sem boundary")
+    for chunk in body.split(b"--" + boundary.encode("latin-1"))[1:]:
+        if chunk.startswith(b"--"):  # fim do corpo
+            break
+        head, _, data = chunk.partition(b"\r\n\r\n")
+        part = BytesParser().parsebytes(head.strip(b"\r\n") + b"\r\n\r\n", headersonly=True)
+        field = part.get_param("name", header="content-disposition") or ""
+        name = part.get_filename() or field
+        if site and field.lower() in ("p1", "p2"):
+            name = f"{site}_{field.upper()}.csv" + (".gz" if name.lower().endswith(".gz") else "")
+        yield name, data[:-2] if data.endswith(b"\r\n") else data
+
+def format_result(out, shape):
+    """Colunas de resultado no formato pedido; NaN/inf viram null."""
+    cols = {k: [v if np.isfinite(v) else None for v in np.asarray(a, dtype="float64").tolist()]
+            for k, a in out.items()}
+    if shape == "colunas":
+        return cols
+    rows = [dict(zip(cols, vals)) for vals in zip(*cols.values())]
+    return rows[0] if shape == "objeto" else rows
+
+def micro_batcher(fn, max_batch=8192, max_wait=0.0, on_batch=None):
+    """submit(colunas) -> Future das colunas de resultado dessas linhas.
+
+    Uma thread junta os pedidos que chegam enquanto o lote anterior é calculado e avalia
+    todos numa chamada de `fn`; com max_wait > 0, espera até esse tempo por mais pedidos."""
+    q = queue.SimpleQueue()
+
+    def loop():
+        while True:
+            items = [q.get()]
+            n = len(next(iter(items[0][0].values())))
+            deadline = time.perf_counter() + max_wait
+            while n < max_batch:
+                try:
+                    wait = deadline - time.perf_counter()
+                    item = q.get(timeout=wait) if wait > 0 else q.get_nowait()
+                except queue.Empty:
+                    break
+                items.append(item)
+                n += len(next(iter(item[0].values())))
+            try:
+                cols = {k: np.concatenate([c[k] for c, _ in items]) for k in items[0][0]}
+                out = fn(cols)
+                start = 0
+                for c, fut in items:
+                    stop = start + len(next(iter(c.values())))
+                    fut.set_result({k: np.asarray(v)[start:stop] for k, v in out.items()})
+                    start = stop
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+            if on_batch:
+                on_batch(len(items), n)
+
+    threading.Thread(target=loop, daemon=True, name="adops-batcher").start()
+
+    def submit(cols):
+        fut = Future()
+        q.put((cols, fut))
+        return fut
+
+    return submit
+
+def new_metrics():
+    """Contadores por rota; record() e snapshot() são seguros entre threads."""
+    lock = threading.Lock()
+    t0 = time.time()
+    routes = {}
+
+    def route(name):
+        return routes.setdefault(name, {"requisicoes": 0, "erros": 0, "itens": 0, "lotes": 0,
+                                        "requisicoes_em_lote": 0, "itens_em_lote": 0,
+                                        "lat": deque(maxlen=LATENCY_SAMPLES)})
+
+    def record(name, seconds, items=0, error=False):
+        with lock:
+            r = route(name)
+            r["requisicoes"] += 1
+            r["erros"] += bool(error)
+            r["itens"] += items
+            r["lat"].append(seconds)
+
+    def batch(name, requests, items):
+        with lock:
+            r = route(name)
+            r["lotes"] += 1
+            r["requisicoes_em_lote"] += requests
+            r["itens_em_lote"] += items
+
+    def snapshot():
+        with lock:
+            up = time.time() - t0
+            out = {"uptime_s": round(up, 1), "rotas": {}}
+            for name, r in sorted(routes.items()):
+                lat = np.array(r["lat"]) * 1000.0
+                p50, p95, p99 = np.percentile(lat, [50, 95, 99]).round(3).tolist() if len(lat) else (None,) * 3
+                out["rotas"][name] = {
+                    "requisicoes": r["requisicoes"], "erros": r["erros"], "itens": r["itens"],
+                    "req_por_s": round(r["requisicoes"] / up, 2), "itens_por_s": round(r["itens"] / up, 2),
+                    "lotes": r["lotes"],
+                    "requisicoes_por_lote": round(r["requisicoes_em_lote"] / r["lotes"], 2) if r["lotes"] else None,
+                    "itens_por_lote": round(r["itens_em_lote"] / r["lotes"], 2) if r["lotes"] else None,
+                    "latencia_ms": {"p50": p50, "p95": p95, "p99": p99},
+                }
+            return out
+
+    return record, batch, snapshot
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive: scripts reaproveitam a conexão
+
+    def log_message(self, fmt, *args):
+        logger.debug("%s - %s", self.address_string(), fmt % args)
+
+    def _send(self, status, body):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self):
+        size = int(self.headers.get("Content-Length") or 0)
+        if size > MAX_BODY:
+            self.close_connection = True  # o corpo não é lido: a conexão não serve mais
+            raise ValueError(f"corpo maior que {MAX_BODY // 2**20} MB")
+        return self.rfile.read(size)
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == "/metrics":
+            self._send(200, self.server.app["snapshot"]())
+        elif path == "/health":
+            self._send(200, {"ok": True})
+        else:
+            self._send(404, {"erro": f"rota desconhecida: {path}"})
+
+    def do_POST(self):
+        t0 = time.perf_counter()
+        url = urlsplit(self.path)
+        app = self.server.app
+        items, status = 0, 200
+        try:
+            body = self._body()
+            if url.path in CALCS:
+                cols, shape = parse_payload(json.loads(body or b"null"), CALCS[url.path][0])
+                items = len(next(iter(cols.values())))
+                out = app["batchers"][url.path](cols).result() if items else CALCS[url.path][1](cols)
+                result = format_result(out, shape)
+            elif url.path == "/lote":
+                result = self._lote(body, parse_qs(url.query), self.headers.get("Content-Type", ""))
+                items = len(result)
+            else:
+                status, result = 404, {"erro": f"rota desconhecida: {url.path}"}
+        except ValueError as e:  # inclui JSON inválido
+            status, result = 400, {"erro": str(e)}
+        except Exception as e:
+            logger.exception("erro em %s", url.path)
+            status, result = 500, {"erro": str(e)}
+        self._send(status, result)
+        app["record"](url.path, time.perf_counter() - t0, items, status != 200)
+
+    def _lote(self, body, query, content_type):
+        try:
+            cpa, roas = float(query["cpa"][0]), float(query["roas"][0])
+        except (KeyError, ValueError):
+            raise ValueError("informe ?cpa=...&roas=... na URL") from None
+        try:
+            if content_type.lower().startswith("multipart/form-data"):
+                named = list(form_reports(body, content_type, query.get("site", [None])[0]))
+            else:
+                named = list(zip_members(body))
+        except Exception:
+            raise ValueError("o corpo deve ser um ZIP ou multipart/form-data com site_P1.csv / site_P2.csv") from None
+        pairs, incompletos, ignorados = pair_reports(named)
+        pool = self.server.app["pool"]
+        futs = [pool.submit(price_pair, s, p1, p2, cpa, roas) for s, (p1, p2) in pairs.items()]
+        rows = [f.result() for f in futs]
+        rows += [{"Site": s, "Erro": "sem o par P1/P2"} for s in incompletos]
+        rows += [{"Site": n, "Erro": "fora do padrão site_P1.csv / site_P2.csv"} for n in ignorados]
+        return [{k: (None if isinstance(v, float) and not np.isfinite(v) else v) for k, v in r.items()} for r in rows]
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128  # muitos clientes conectando ao mesmo tempo
+
+def make_server(host="127.0.0.1", port=8765, workers=None, max_batch=8192, max_wait=0.0):
+    """ThreadingHTTPServer pronto (ainda sem servir); `server.app` guarda pool, micro-lotes e métricas."""
+    record, batch, snapshot = new_metrics()
+    server = _Server((host, port), _Handler)
+    server.app = {
+        "record": record,
+        "snapshot": snapshot,
+        "batchers": {
+            path: micro_batcher(fn, max_batch, max_wait, on_batch=lambda r, n, p=path: batch(p, r, n))
+            for path, (_, fn) in CALCS.items()
+        },
+        # spawn: mesmo motivo de adops.batch.run_batch; processos sobem sob demanda no 1º lote
+        "pool": ProcessPoolExecutor(workers or os.cpu_count() or 1, mp_context=mp.get_context("spawn")),
+    }
+    return server
+
+def serve(server):
+    """Atende até Ctrl+C; depois fecha o socket e o pool de processos."""
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.app["pool"].shutdown(cancel_futures=True)
@@ -0,0 +1,145 @@
+"""Histórico local (SQLite): agregados diários por bloco de cada par P1/P2 ingerido.
+
+Cada (dia, site, P1|P2) guarda uma versão só: reenviar o mesmo arquivo não faz nada e
+um arquivo diferente para o mesmo dia substitui o anterior. As séries de tendência
+saem direto da tabela diária, sem reler CSVs."""
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from adops.paths import data_dir
+from adops.pricing import calc_cpc_corrigido, calc_perda_usuario, price_units_p1, unit_clicks
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS relatorios (
+    site TEXT NOT NULL, tipo TEXT NOT NULL, dia TEXT NOT NULL,
+    digest TEXT NOT NULL, ingerido_em TEXT NOT NULL,
+    PRIMARY KEY (site, tipo, dia)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS blocos_dia (
+    site TEXT NOT NULL, tipo TEXT NOT NULL, bloco TEXT NOT NULL, dia TEXT NOT NULL,
+    categoria TEXT, solicitacoes REAL, cliques REAL, impressoes REAL, receita REAL,
+    cpc REAL, taxa REAL, ctr REAL, perda REAL, cpc_alvo REAL,
+    perda_usuario REAL, cpc_corrigido REAL,
+    PRIMARY KEY (site, tipo, bloco, dia)
+) WITHOUT ROWID;
+"""
+_SUMS = ("solicitacoes", "cliques", "impressoes", "receita", "perda_usuario")
+_RATIOS = ("cpc", "taxa", "ctr", "perda", "cpc_alvo", "cpc_corrigido")
+METRICS = _SUMS + _RATIOS
+
+@contextmanager
+def connect(path=None):
+    """Conexão numa transação (commit ao sair sem erro) que é fechada no fim."""
+    con = sqlite3.connect(path or data_dir() / "historico.sqlite")
+    try:
+        con.execute("PRAGMA journal_mode=WAL")
+        con.executescript(_SCHEMA)
+        with con:
+            yield con
+    finally:
+        con.close()
+
+def _aggregate(t: pd.DataFrame) -> pd.DataFrame:
+    """Uma linha por bloco: contagens somadas, taxas/CPCs ponderados por solicitações."""
+    keys = [t["bloco"], t["categoria"]]
+    out = t[[c for c in _SUMS if c in t]].groupby(keys, sort=False).sum(min_count=1)
+    w = t["solicitacoes"].astype("float64")
+    for c in _RATIOS:
+        if c in t:
+            x = t[c].astype("float64")
+            ok = x.notna() & (w > 0)
+            num = (x * w).where(ok).groupby(keys, sort=False).sum()
+            den = w.where(ok).groupby(keys, sort=False).sum()
+            out[c] = num / den.replace(0, np.nan)
+    return out.reset_index(names=["bloco", "categoria"])
+
+def _daily_p1(p1, m1, u1, cliques_p2, cpa, roas):
+    keep = np.asarray(u1["categoria"] != "total")
+    body = p1[keep]
+    daily = _aggregate(pd.DataFrame({
+        "bloco": body[m1["bloco"]].astype(str), "categoria": np.asarray(u1["categoria"].astype(str))[keep],
+        "solicitacoes": body["_sol"], "cliques": body["_cli"],
+        "cpc": body["_cpc"], "taxa": body["_taxa"], "ctr": body["_ctr"],
+    }))
+    # Perda / CPC Alvo do bloco inteiro (linhas repetidas somadas), não a média das linhas
+    t = price_units_p1(p1, u1, m1["bloco"], cliques_p2, cpa, roas).set_index("Bloco")
+    daily["perda"] = (t["Perda (%)"] / 100.0).reindex(daily["bloco"]).to_numpy()
+    daily["cpc_alvo"] = t["CPC Alvo"].reindex(daily["bloco"]).to_numpy()
+    return daily
+
+def _daily_p2(p2, m2, u2):
+    keep = np.asarray(u2["categoria"] != "total")
+    body = p2[keep]
+    perda_u = calc_perda_usuario(body["_sol"], body["_taxa"], body["_imp"])
+    return _aggregate(pd.DataFrame({
+        "bloco": body[m2["bloco"]].astype(str), "categoria": np.asarray(u2["categoria"].astype(str))[keep],
+        "solicitacoes": body["_sol"], "cliques": body["_cli"], "impressoes": body["_imp"],
+        "receita": body["_rec"], "taxa": body["_taxa"],
+        "cpc": body["_cpc"] if "_cpc" in body else np.nan,
+        "ctr": body["_ctr"] if "_ctr" in body else np.nan,
+        "perda_usuario": perda_u,
+        "cpc_corrigido": calc_cpc_corrigido(body["_rec"], body["_cli"], perda_u),
+    }))
+
+def _replace(con, site, tipo, dia, digest, daily):
+    """Grava a versão do relatório; False se o mesmo arquivo já estava salvo."""
+    row = con.execute(
+        "SELECT digest FROM relatorios WHERE site=? AND tipo=? AND dia=?", (site, tipo, dia)
+    ).fetchone()
+    if row and row[0] == digest:
+        return False
+    con.execute("DELETE FROM blocos_dia WHERE site=? AND tipo=? AND dia=?", (site, tipo, dia))
+    cols = ["bloco", "categoria", *(c for c in METRICS if c in daily)]
+    data = daily[cols].astype(object).where(daily[cols].notna(), None)
+    con.executemany(
+        f"INSERT INTO blocos_dia (site, tipo, dia, {', '.join(cols)}) "
+        f"VALUES (?, ?, ?{', ?' * len(cols)})",
+        ((site, tipo, dia, *r) for r in data.itertuples(index=False)),
+    )
+    con.execute(
+        "INSERT OR REPLACE INTO relatorios VALUES (?, ?, ?, ?, ?)",
+        (site, tipo, dia, digest, datetime.now().isoformat(timespec="seconds")),
+    )
+    return True
+
+def ingest_pair(dia: date, site, p1_report, p2_report, digests, cpa, roas, path=None):
+    """Salva o par (df, mapeamento, _, índice) do dia; retorna (P1 novo?, P2 novo?)."""
+    p1, m1, _, u1 = p1_report
+    p2, m2, _, u2 = p2_report
+    cliques_p2 = unit_clicks(p2, u2, m2["bloco"])
+    with connect(path) as con:
+        return (
+            _replace(con, site, "P1", dia.isoformat(), digests[0], _daily_p1(p1, m1, u1, cliques_p2, cpa, roas)),
+            _replace(con, site, "P2", dia.isoformat(), digests[1], _daily_p2(p2, m2, u2)),
+        )
+
+def list_sites(path=None):
+    with connect(path) as con:
+        return [r[0] for r in con.execute("SELECT DISTINCT site FROM relatorios ORDER BY site")]
+
+def list_blocos(site, tipo, path=None):
+    """[(bloco, categoria)] já vistos no histórico do site."""
+    with connect(path) as con:
+        return con.execute(
+            "SELECT DISTINCT bloco, categoria FROM blocos_dia WHERE site=? AND tipo=? ORDER BY bloco",
+            (site, tipo),
+        ).fetchall()
+
+def trend(site, tipo, metric, blocos=None, days=90, path=None):
+    """Série diária da métrica: índice = dia, uma coluna por bloco."""
+    if metric not in METRICS:
+        raise ValueError(f"métrica desconhecida: {metric}")
+    since = (date.today() - timedelta(days=days)).isoformat()
+    sql = f"SELECT dia, bloco, {metric} FROM blocos_dia WHERE site=? AND tipo=? AND dia>=?"
+    args = [site, tipo, since]
+    if blocos:
+        sql += f" AND bloco IN ({', '.join('?' * len(blocos))})"
+        args += list(blocos)
+    with connect(path) as con:
+        df = pd.read_sql_query(sql, con, params=args)
+    df["dia"] = pd.to_datetime(df["dia"])
+    return df.pivot(index="dia", columns="bloco", values=metric).sort_index()
@@ -0,0 +1,87 @@
+"""Índice de blocos de anúncio: classifica cada bloco uma vez por relatório."""
+import numpy as np
+import pandas as pd
+
+_TEXT = "string[pyarrow]"
+
+UNIT_TOKENS = ("interstitial", "offerwall", "mob_top", "rewarded", "reward", "offer_wall", "offwall")
+UNIT_CATEGORY = {
+    "interstitial": "interstitial",
+    "offerwall": "offerwall", "offer_wall": "offerwall", "offwall": "offerwall",
+    "rewarded": "rewarded", "reward": "rewarded",
+    "mob_top": "mob_top",
+}
+CATEGORIES = ("interstitial", "offerwall", "rewarded", "mob_top", "total", "other")
+INTER_TOKENS = ("interstitial", "offerwall")
+REWARDED_TOKENS = ("rewarded", "reward", "offerwall", "offer_wall", "offwall")
+_UNIT_RE = "|".join(sorted(UNIT_TOKENS, key=len, reverse=True))
+_TOKEN_BIT = {tk: 1 << i for i, tk in enumerate(UNIT_TOKENS)}
+
+def _distinct(col: pd.Series):
+    """(código por linha, valores distintos em minúsculas); NaN tem código -1."""
+    codes, uniques = pd.factorize(col)
+    return codes, pd.Series(uniques).astype(_TEXT).str.strip().str.lower()
+
+def _spread(codes, per_unique, dtype):
+    """Leva o valor de cada distinto para as linhas; código -1 (NaN) recebe 0."""
+    return np.append(np.asarray(per_unique, dtype=dtype), np.zeros(1, dtype))[codes]
+
+def _token_bits(values: pd.Series):
+    """Bits dos tokens presentes em cada valor: uma regex com todos os tokens seleciona
+    os candidatos; só eles passam pela marcação token a token."""
+    bits = np.zeros(len(values), np.uint8)
+    cand = np.flatnonzero(values.str.contains(_UNIT_RE).fillna(False).to_numpy(bool))
+    sub = values.iloc[cand]
+    for tk, bit in _TOKEN_BIT.items():
+        bits[cand[sub.str.contains(tk, regex=False).to_numpy(bool)]] |= bit
+    return bits
+
+def build_unit_index(df, col_bloco):
+    """Classifica todos os blocos em uma passada; lookups depois são O(1).
+
+    Retorna {"total": posição da linha Total ou None, "first": token -> posição da
+    primeira linha que o contém, "categoria": rótulo por linha}."""
+    n = len(df)
+    codes, values = _distinct(df[df.columns[0]])
+    is_total = _spread(codes, values.eq("total").to_numpy(bool), bool)
+    if col_bloco:
+        codes, values = _distinct(df[col_bloco])
+        bits = _spread(codes, _token_bits(values), np.uint8)
+    else:
+        bits = np.zeros(n, np.uint8)
+    bits[is_total] = 0
+    first = {}
+    for tk, bit in _TOKEN_BIT.items():
+        pos = np.flatnonzero(bits & bit)
+        if len(pos):
+            first[tk] = int(pos[0])
+    cats = np.full(n, CATEGORIES.index("other"), dtype=np.int8)
+    for cat in reversed(CATEGORIES[:4]):  # o primeiro da lista vence
+        cat_bits = sum(b for tk, b in _TOKEN_BIT.items() if UNIT_CATEGORY[tk] == cat)
+        cats[(bits & cat_bits) != 0] = CATEGORIES.index(cat)
+    cats[is_total] = CATEGORIES.index("total")
+    total = np.flatnonzero(is_total)
+    return {
+        "total": int(total[0]) if len(total) else None,
+        "first": first,
+        "categoria": pd.Categorical.from_codes(cats, CATEGORIES),
+    }
+
+def get_total_or_sum(df, units, col_name):
+    """Usa linha 'Total' se existir; senão, soma linhas (coluna já convertida)."""
+    if units["total"] is not None:
+        return df[col_name].iloc[units["total"]]
+    return df[col_name].sum()
+
+def get_row(df, units, token):
+    """Retorna a primeira linha do bloco (ignorando 'Total')."""
+    pos = units["first"].get(token)
+    return df.iloc[pos] if pos is not None else None
+
+def first_row(df, units, tokens):
+    """(linha, token) do primeiro token encontrado; (None, None) se nenhum."""
+    for tk in tokens:
+        row = get_row(df, units, tk)
+        if row is not None:
+            return row, tk
+    return None, None
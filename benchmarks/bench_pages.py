@@ -0,0 +1,207 @@
+"""Benchmark de abertura e rerun das páginas (Streamlit AppTest, sem navegador).
+
+Cada página roda em processos novos (--repeat vezes) e mede:
+  importacao  tempo dos imports da página num interpretador limpo;
+  primeira    primeira execução do script (inclui os imports e o primeiro render);
+  rerun       reruns seguidos na mesma sessão (mexendo no primeiro number_input, se houver).
+Relata p50/p95, acrescenta em benchmarks/results_pages.jsonl e compara com a última
+execução na mesma máquina. O IAdops recebe P1/P2 sintéticos (benchmarks/synth.py).
+
+    python benchmarks/bench_pages.py --pages IAdops Home --reruns 30 --rows 100k
+"""
+import argparse
+import ast
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+REPO = ROOT.parent
+DATA = ROOT / ".data"
+RESULTS = ROOT / "results_pages.jsonl"
+
+# página -> (script, {trecho do rótulo do uploader: tipo do relatório sintético})
+PAGES = {
+    "Home": ("Home.py", {}),
+    "IAdops": ("pages/IAdops.py", {"P1": "p1", "P2": "p2"}),
+    "Precificacao_P1": ("pages/Precificacao_P1.py", {}),
+    "Precificacao_P2": ("pages/Precificacao_P2.py", {}),
+    "Calculo_Variacao": ("pages/Calculo_Variacao.py", {}),
+}
+METRICS = ("importacao", "primeira", "rerun_p50", "rerun_p95")
+
+_uploads = {}
+
+def fake_uploader(files):
+    """st.file_uploader que devolve os arquivos do benchmark (lidos uma vez por processo)."""
+    def uploader(label, *args, **kwargs):
+        for tag, path in files.items():
+            if tag in label:
+                if path not in _uploads:
+                    _uploads[path] = Path(path).read_bytes()
+                f = io.BytesIO(_uploads[path])
+                f.name, f.file_id = os.path.basename(path), path
+                return [f] if kwargs.get("accept_multiple_files") else f
+        return [] if kwargs.get("accept_multiple_files") else None
+    return uploader
+
+def _script(page, files):
+    """A página como o servidor a executa, com os uploads trocados pelos sintéticos."""
+    return f"""
+import sys
+import streamlit as st
+sys.path[:0] = [{str(REPO)!r}, {str(ROOT)!r}]
+if {files!r}:
+    from bench_pages import fake_uploader
+    st.file_uploader = fake_uploader({files!r})
+exec(compile(open({page!r}, encoding="utf-8").read(), {page!r}, "exec"), {{"__name__": "__main__"}})
+"""
+
+def import_seconds(page):
+    """Tempo dos imports do topo da página (no processo atual, que deve estar limpo)."""
+    tree = ast.parse(Path(page).read_text(encoding="utf-8"))
+    imports = ast.Module([n for n in tree.body if isinstance(n, (ast.Import, ast.ImportFrom))], [])
+    code = compile(imports, page, "exec")
+    t0 = time.perf_counter()
+    exec(code, {"__name__": "__bench__"})
+    return time.perf_counter() - t0
+
+def run_page(page, files, reruns):
+    """{"primeira": s, "reruns": [s, ...]} de uma sessão nova da página."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(_script(page, files), default_timeout=600)
+    t0 = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t0
+    errors = [e.value for e in at.exception]
+    times = []
+    for i in range(reruns):
+        if at.number_input:
+            box = at.number_input[0]
+            box.set_value((box.value or 0) + (1 if i % 2 == 0 else -1))
+        t0 = time.perf_counter()
+        at.run()
+        times.append(time.perf_counter() - t0)
+        errors += [e.value for e in at.exception]
+    return {"primeira": first, "reruns": times, "erros": errors[:3]}
+
+def _worker(args):
+    """Modo filho: uma medida num interpretador limpo, em JSON na saída padrão."""
+    page = str(REPO / PAGES[args.worker][0])
+    files = json.loads(args.files)
+    sys.path.insert(0, str(REPO))
+    os.chdir(REPO)
+    if args.imports:
+        out = {"importacao": import_seconds(page)}
+    else:
+        out = run_page(page, files, args.reruns)
+    print(json.dumps(out))
+
+def _child(name, files, reruns=0, imports=False, env=None):
+    cmd = [sys.executable, __file__, "--worker", name, "--files", json.dumps(files), "--reruns", str(reruns)]
+    if imports:
+        cmd.append("--imports")
+    out = subprocess.run(cmd, capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def _pct(values, q):
+    """Percentil por posição (sem interpolação): p50/p95 de poucas amostras."""
+    xs = sorted(values)
+    return xs[min(len(xs) - 1, int(q * len(xs)))] if xs else None
+
+def synthetic_files(kinds, rows):
+    """{rótulo: caminho} dos relatórios sintéticos pedidos pela página."""
+    from synth import write_report
+
+    DATA.mkdir(exist_ok=True)
+    files = {}
+    for tag, kind in kinds.items():
+        path = DATA / f"{kind}_{rows}_semi_pt.csv"  # mesmo nome do bench_parse: gerado uma vez só
+        if not path.exists():
+            write_report(path, rows, kind)
+        files[tag] = str(path)
+    return files
+
+def measure(name, rows, reruns, repeat):
+    """p50/p95 de importação, primeira execução e rerun de `repeat` processos novos."""
+    files = synthetic_files(PAGES[name][1], rows)
+    imports, firsts, rerun_times, errors = [], [], [], []
+    for _ in range(repeat):
+        # histórico e cache de cabeçalhos num diretório descartável: cada processo começa frio
+        env = {**os.environ, "ADOPS_HOME": tempfile.mkdtemp(prefix="adops-bench-")}
+        imports.append(_child(name, files, imports=True, env=env)["importacao"])
+        run = _child(name, files, reruns, env=env)
+        firsts.append(run["primeira"])
+        rerun_times += run["reruns"]
+        errors += run["erros"]
+    return {
+        "importacao": _pct(imports, 0.5), "importacao_p95": _pct(imports, 0.95),
+        "primeira": _pct(firsts, 0.5), "primeira_p95": _pct(firsts, 0.95),
+        "rerun_p50": _pct(rerun_times, 0.5), "rerun_p95": _pct(rerun_times, 0.95),
+        "amostras_rerun": len(rerun_times), "erros": errors[:3],
+    }
+
+def _key(r):
+    return r["host"], r["pagina"], r["linhas"]
+
+def previous_results(path=RESULTS):
+    """Último resultado de cada (máquina, página, tamanho dos uploads)."""
+    last = {}
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                r = json.loads(line)
+                last[_key(r)] = r
+    return last
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pages", nargs="+", default=list(PAGES), choices=list(PAGES))
+    parser.add_argument("--rows", default="10k", help="linhas dos P1/P2 sintéticos do IAdops (ex.: 10k, 1M)")
+    parser.add_argument("--reruns", type=int, default=20, help="reruns medidos por sessão")
+    parser.add_argument("--repeat", type=int, default=3, help="processos novos por página")
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora relativa que conta como regressão")
+    parser.add_argument("--no-save", action="store_true", help="não grava em results_pages.jsonl")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    parser.add_argument("--worker", choices=list(PAGES), help=argparse.SUPPRESS)
+    parser.add_argument("--files", default="{}", help=argparse.SUPPRESS)
+    parser.add_argument("--imports", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.worker:
+        return _worker(args)
+
+    from bench_parse import _commit
+    from synth import parse_size
+
+    rows = parse_size(args.rows)
+    last = previous_results()
+    base = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _commit(), "host": platform.node(),
+            "python": platform.python_version(), "linhas": rows}
+    out, regressions = [], []
+    for name in args.pages:
+        r = {**base, "pagina": name, **measure(name, rows, args.reruns, args.repeat)}
+        prev = last.get(_key(r))
+        for m in METRICS:
+            if prev and prev.get(m) and r[m] > 0.01 and r[m] > prev[m] * (1 + args.threshold):
+                regressions.append((name, m, prev[m], r[m]))
+        out.append(r)
+        print(f"{name:<17} importação {r['importacao']:7.3f}s  primeira {r['primeira']:7.3f}s "
+              f"(p95 {r['primeira_p95']:.3f})  rerun p50 {r['rerun_p50'] * 1000:8.1f} ms "
+              f"p95 {r['rerun_p95'] * 1000:8.1f} ms" + (f"  ERROS: {r['erros']}" if r["erros"] else ""), flush=True)
+    if not args.no_save:
+        with RESULTS.open("a", encoding="utf-8") as f:
+            for r in out:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    for name, m, before, now in regressions:
+        print(f"REGRESSÃO: {name} {m}: {before:.4f}s -> {now:.4f}s", file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
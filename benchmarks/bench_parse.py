@@ -0,0 +1,159 @@
+"""Benchmark das etapas de leitura e precificação sobre relatórios sintéticos.
+
+Mede tempo (melhor de --repeat) e pico de memória (tracemalloc + pool do Arrow) de cada
+etapa, para cada tamanho, separador e formato numérico; acrescenta os resultados em
+benchmarks/results.jsonl e compara tempo e memória com a última execução na mesma máquina.
+
+    python benchmarks/bench_parse.py --sizes 1k,100k,1M --seps ";" , tab --locales pt en
+"""
+import argparse
+import io
+import json
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(ROOT.parent))
+
+from adops.parsing import convert_mapped, load_report, map_cols, read_gam_csv  # noqa: E402
+from adops.pricing import P1_COLS, P2_COLS, price_units_p1, price_units_p2  # noqa: E402
+from adops.profiling import stage  # noqa: E402
+from adops.units import UNIT_TOKENS, build_unit_index, get_row, get_total_or_sum  # noqa: E402
+from synth import parse_size, write_report  # noqa: E402
+
+DATA = ROOT / ".data"
+RESULTS = ROOT / "results.jsonl"
+COLS = {"p1": P1_COLS, "p2": P2_COLS}
+SEP_NAMES = {";": "semi", ",": "comma", "tab": "tab"}
+
+def report_bytes(rows, kind, sep, locale):
+    """Conteúdo do relatório sintético (gerado uma vez e guardado em benchmarks/.data)."""
+    DATA.mkdir(exist_ok=True)
+    path = DATA / f"{kind}_{rows}_{SEP_NAMES[sep]}_{locale}.csv"
+    if not path.exists():
+        write_report(path, rows, kind, sep, locale)
+    return path.read_bytes()
+
+def run_stages(data, kind, repeat):
+    """[{"etapa", "segundos", "pico_mb"}] de cada etapa.
+
+    A primeira passada mede só a memória (o tracemalloc atrasa o Python); as --repeat
+    seguintes, só o tempo, e fica o menor."""
+    best = {}
+    for i in range(repeat + 1):
+        rec = []
+        memory = i == 0
+
+        def measure(name):
+            return stage(rec, name, memory)
+
+        with measure("read_gam_csv"):
+            df = read_gam_csv(io.BytesIO(data))
+        with measure("map_cols"):
+            m = map_cols(df)
+        with measure("convert"):
+            convert_mapped(df, m, COLS[kind])
+        with measure("unit_index"):
+            units = build_unit_index(df, m["bloco"])
+        with measure("get_row"):
+            for tk in UNIT_TOKENS:
+                get_row(df, units, tk)
+            get_total_or_sum(df, units, "_cli")
+        with measure("price_units"):
+            if kind == "p1":
+                price_units_p1(df, units, m["bloco"], None, 1.5, 120.0)
+            else:
+                price_units_p2(df, units, m["bloco"], 0.5)
+        del df
+        with measure("load_report"):
+            load_report(io.BytesIO(data), list(COLS[kind]))
+        for r in rec:
+            if memory:
+                best[r["etapa"]] = {"etapa": r["etapa"], "segundos": float("inf"), "pico_mb": r["pico_mb"]}
+            else:
+                b = best[r["etapa"]]
+                b["segundos"] = min(b["segundos"], r["segundos"])
+    return list(best.values())
+
+def _commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def _key(r):
+    return r["host"], r["linhas"], r["tipo"], r["sep"], r["locale"], r["etapa"]
+
+def previous_results(path=RESULTS):
+    """Último resultado de cada (máquina, tamanho, tipo, separador, locale, etapa)."""
+    last = {}
+    if path.exists():
+        for line in path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                r = json.loads(line)
+                last[_key(r)] = r
+    return last
+
+def _mb(v):
+    return f"{v:.1f} MB" if v is not None else "? MB"
+
+def regression(r, threshold):
+    """O que piorou mais que threshold em relação à execução anterior: tempo e/ou pico de memória.
+
+    Etapas abaixo de 10 ms ou de 1 MB ficam de fora (ruído)."""
+    worse = []
+    if r["anterior"] is not None and r["segundos"] > 0.01 and r["segundos"] > r["anterior"] * (1 + threshold):
+        worse.append(f"{r['anterior']:.4f}s -> {r['segundos']:.4f}s")
+    if r["pico_anterior"] is not None and r["pico_mb"] > 1 and r["pico_mb"] > r["pico_anterior"] * (1 + threshold):
+        worse.append(f"{_mb(r['pico_anterior'])} -> {_mb(r['pico_mb'])}")
+    return worse
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1k,10k,100k,1M", help="ex.: 1k,100k,10M")
+    parser.add_argument("--kinds", nargs="+", default=["p1", "p2"], choices=["p1", "p2"])
+    parser.add_argument("--seps", nargs="+", default=[";"], choices=[";", ",", "tab"])
+    parser.add_argument("--locales", nargs="+", default=["pt"], choices=["pt", "en"])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=0.2, help="piora relativa que conta como regressão")
+    parser.add_argument("--no-save", action="store_true", help="não grava em results.jsonl")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args(argv)
+
+    last = previous_results()
+    base = {"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _commit(), "host": platform.node(),
+            "python": platform.python_version()}
+    rows, regressions = [], []
+    for size in map(parse_size, args.sizes.split(",")):
+        for kind in args.kinds:
+            for sep in args.seps:
+                for locale in args.locales:
+                    data = report_bytes(size, kind, sep, locale)
+                    for r in run_stages(data, kind, args.repeat):
+                        r = {**base, "linhas": size, "tipo": kind, "sep": sep, "locale": locale, **r}
+                        prev = last.get(_key(r))
+                        r["anterior"] = prev["segundos"] if prev else None
+                        r["pico_anterior"] = prev.get("pico_mb") if prev else None
+                        worse = regression(r, args.threshold)
+                        if worse:
+                            regressions.append((r, worse))
+                        rows.append(r)
+                        print(f"{size:>10,} {kind} {sep:>3} {locale} {r['etapa']:<13} {r['segundos']:9.4f}s "
+                              f"{r['pico_mb']:9.1f} MB"
+                              + (f"  (antes {prev['segundos']:.4f}s, {_mb(r['pico_anterior'])})" if prev else ""),
+                              flush=True)
+    if not args.no_save:
+        with RESULTS.open("a", encoding="utf-8") as f:
+            for r in rows:
+                f.write(json.dumps(r, ensure_ascii=False) + "\n")
+    for r, worse in regressions:
+        print(f"REGRESSÃO: {r['etapa']} ({r['linhas']:,} linhas {r['tipo']} {r['sep']} {r['locale']}): "
+              + "; ".join(worse), file=sys.stderr)
+    return 1 if regressions and args.fail_on_regression else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
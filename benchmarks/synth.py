@@ -0,0 +1,92 @@
+"""Gerador de relatórios sintéticos do GAM (P1/P2) para os benchmarks.
+
+Reproduz o que aparece nos exports reais: preâmbulo antes do cabeçalho, separador
+; , ou tab, números pt-BR ou en-US (milhar, decimais, %), linha "Total" e blocos
+interstitial / mob_top / rewarded / offerwall misturados a blocos comuns.
+
+    python benchmarks/synth.py saida.csv --rows 1M --kind p2 --sep , --locale en
+"""
+import argparse
+import csv
+
+import numpy as np
+import pandas as pd
+
+HEADERS = {
+    "p1": ["Bloco de anúncios", "Solicitações de anúncios", "Cliques do Ad Exchange", "CTR do Ad Exchange",
+           "Taxa de correspondência", "CPC do Ad Exchange (US$)", "eCPM médio do Ad Exchange"],
+    "p2": ["Bloco de anúncios", "Solicitações de anúncios", "Cliques do Ad Exchange", "Impressões do Ad Exchange",
+           "Taxa de correspondência", "Receita do Ad Exchange (US$)", "CPC do Ad Exchange (US$)", "CTR do Ad Exchange"],
+}
+KEY_UNITS = ["app_interstitial", "app_mob_top", "app_rewarded", "app_offerwall", "app_rewarded_video"]
+SEPS = {";": ";", ",": ",", "tab": "\t", "\t": "\t"}
+CHUNK = 1_000_000
+
+def parse_size(text: str) -> int:
+    """"1k" -> 1000, "10M" -> 10_000_000."""
+    text = str(text).strip().lower()
+    mult = {"k": 1_000, "m": 1_000_000}.get(text[-1:], 1)
+    return int(float(text.rstrip("km")) * mult)
+
+def _fmt(values, decimals, locale, thousands=True, suffix=""):
+    """Formata uma coluna inteira como o GAM exporta (pt: 1.234,56; en: 1,234.56)."""
+    spec = f"{{:{',' if thousands else ''}.{decimals}f}}"
+    s = pd.Series(values).map(spec.format).astype("string[pyarrow]")
+    if locale == "pt":
+        s = s.str.replace(",", "\x00", regex=False).str.replace(".", ",", regex=False).str.replace("\x00", ".", regex=False)
+    return s + suffix if suffix else s
+
+def _chunk(kind, start, n, n_units, locale, rng):
+    units = np.arange(start, start + n) % n_units
+    names = np.where(units < len(KEY_UNITS), np.array(KEY_UNITS, dtype=object)[np.minimum(units, len(KEY_UNITS) - 1)],
+                     pd.Series(units).map("unit_{}".format).to_numpy(object))
+    sol = rng.integers(1_000, 2_000_000, n)
+    cli = (sol * rng.uniform(0, 0.02, n)).astype(np.int64)
+    cols = {
+        "bloco": names,
+        "sol": _fmt(sol, 0, locale),
+        "cli": _fmt(cli, 0, locale),
+    }
+    if kind == "p1":
+        cols["ctr"] = _fmt(rng.uniform(0, 10, n), 2, locale, suffix="%")
+        cols["taxa"] = _fmt(rng.uniform(10, 90, n), 2, locale, suffix="%")
+        cols["cpc"] = _fmt(rng.uniform(0.01, 1, n), 4, locale)
+        cols["ecpm"] = _fmt(rng.uniform(0.1, 3, n), 2, locale)
+    else:
+        cols["imp"] = _fmt((sol * rng.uniform(0, 1, n)).astype(np.int64), 0, locale)
+        cols["taxa"] = _fmt(rng.uniform(10, 90, n), 2, locale, suffix="%")
+        cols["rec"] = _fmt(rng.uniform(1, 5000, n), 2, locale)
+        cols["cpc"] = _fmt(rng.uniform(0.01, 1, n), 4, locale)
+        cols["ctr"] = _fmt(rng.uniform(0, 10, n), 2, locale, suffix="%")
+    return pd.DataFrame(cols), int(sol.sum()), int(cli.sum())
+
+def write_report(path, rows, kind="p1", sep=";", locale="pt", units=5_000, seed=0):
+    """Escreve o relatório com `rows` linhas de blocos + a linha Total."""
+    sep = SEPS[sep]
+    rng = np.random.default_rng(seed)
+    n_units = max(min(units, rows), len(KEY_UNITS))
+    solicitacoes = cliques = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Relatório do Ad Exchange\nPeríodo: 01/10/2026 - 01/10/2026\n\n")
+        csv.writer(f, delimiter=sep, lineterminator="\n").writerow(HEADERS[kind])
+        for start in range(0, rows, CHUNK):
+            df, sol, cli = _chunk(kind, start, min(CHUNK, rows - start), n_units, locale, rng)
+            df.to_csv(f, sep=sep, header=False, index=False, lineterminator="\n")
+            solicitacoes, cliques = solicitacoes + sol, cliques + cli
+        total = ["Total", *_fmt([solicitacoes, cliques], 0, locale)] + [""] * (len(HEADERS[kind]) - 3)
+        csv.writer(f, delimiter=sep, lineterminator="\n").writerow(total)
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path")
+    parser.add_argument("--rows", default="10k", help="ex.: 1k, 100k, 10M")
+    parser.add_argument("--kind", choices=["p1", "p2"], default="p1")
+    parser.add_argument("--sep", choices=list(SEPS), default=";")
+    parser.add_argument("--locale", choices=["pt", "en"], default="pt")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    write_report(args.path, parse_size(args.rows), args.kind, args.sep, args.locale, seed=args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 import streamlit as st
 
+from adops.pricing import MAX_SCENARIOS, VARIACOES, frange, frange_len, sweep_table, variation_bands
+
 st.set_page_config(page_title="Cálculo de Variação")
 
 st.title("📊 Cálculo de Variação de Regra")
@@ -7,34 +9,45 @@ st.markdown("Escolha se deseja **aumentar ou diminuir** a regra e veja os valore
 
 st.divider()
 
+modo = st.radio("Modo", ["Cálculo único", "Varredura de cenários"], horizontal=True)
+
 # Entradas
 col1, col2 = st.columns(2)
 with col1:
     direcao = st.radio("Deseja:", ["Aumentar", "Diminuir"])
 with col2:
-    valor_atual = st.number_input("Valor atual da regra (R$)", min_value=0.0, format="%.2f")
+    if modo == "Cálculo único":
+        valor_atual = st.number_input("Valor atual da regra (R$)", min_value=0.0, format="%.2f")
+    else:
+        v1, v2, v3 = st.columns(3)
+        valor_de = v1.number_input("Valor de (R$)", min_value=0.0, value=0.10, format="%.2f")
+        valor_ate = v2.number_input("Valor até (R$)", min_value=0.0, value=5.00, format="%.2f")
+        valor_passo = v3.number_input("Passo", min_value=0.01, value=0.05, format="%.2f")
 
 st.divider()
 
+if modo == "Varredura de cenários":
+    n = frange_len(valor_de, valor_ate, valor_passo)
+    if n > MAX_SCENARIOS:
+        st.error(f"⚠️ Grade grande demais ({n:,} cenários). Aumente os passos.".replace(",", "."))
+        st.stop()
+    valores = frange(valor_de, valor_ate, valor_passo)
+    tabela = sweep_table({}, "Valor atual", valores, direcao)
+    st.caption(f"{len(valores):,} valores × {len(VARIACOES)} faixas de variação".replace(",", "."))
+    st.dataframe(tabela.head(1000), hide_index=True)
+    st.download_button(
+        f"⬇️ Baixar CSV ({len(tabela):,} linhas)".replace(",", "."),
+        lambda: tabela.to_csv(index=False).encode("utf-8"),
+        file_name="variacoes_regra.csv", mime="text/csv",
+    )
+    st.stop()
+
 # Botão de cálculo
 if st.button("📈 Calcular Variações"):
-    # Intervalos percentuais
-    variacoes = {
-        "Leve (5%–10%)": (0.05, 0.10),
-        "Média (10%–20%)": (0.10, 0.20),
-        "Agressiva (20%–30%)": (0.20, 0.30),
-    }
-
     st.subheader(f"📋 Variações para {direcao.lower()} a regra:")
 
-    for label, (min_var, max_var) in variacoes.items():
-        if direcao == "Aumentar":
-            maior = valor_atual * (1 + min_var)
-            menor = valor_atual * (1 + max_var)
-        else:
-            maior = valor_atual * (1 - min_var)
-            menor = valor_atual * (1 - max_var)
-
+    de, ate = variation_bands(valor_atual, direcao)
+    for label, maior, menor in zip(VARIACOES, de, ate):
         st.markdown(f"""
         #### {label}  
         {maior:.2f} a {menor:.2f}
@@ -1,8 +1,21 @@
 # pages/IAdops.py
 import streamlit as st
 import pandas as pd
-import re, unicodedata, io
-import math
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import date
+
+from adops import store
+from adops.diff import compare, snapshot
+from adops.parsing import load_report, normalize_text, peek_text, report_date, to_count, to_number
+from adops.batch import expand_uploads, pair_reports, run_batch
+from adops.units import CATEGORIES, INTER_TOKENS, REWARDED_TOKENS, first_row, get_row, get_total_or_sum
+from adops.pricing import (
+    P1_COLS, P1_NEED, P2_COLS, P2_NEED, calc_cpc_alvo, calc_cpc_corrigido, calc_perda, calc_perda_usuario,
+    missing_cols, price_units_p1, price_units_p2, unit_clicks,
+)
+from adops.profiling import checkpoints, log_records
 
 st.set_page_config(page_title="IAdops")
 
@@ -15,128 +28,92 @@ st.divider()
 
 # ===================== Helpers =====================
 
-def normalize_text(s: str) -> str:
-    s = str(s).replace("\u00A0", " ").strip()
-    s = unicodedata.normalize("NFKD", s)
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9]+", "_", s)
-    s = re.sub(r"_+", "_", s).strip("_")
-    return s
-
-def to_number(x):
-    """Conversor pt-BR/en-US robusto (para %/CPC etc.)."""
-    s = str(x).strip().replace("\u00A0", " ")
-    s = s.replace("US$", "").replace("R$", "").replace("%", "").strip()
-    s = s.replace(" ", "")
-    if "," in s and "." in s:
-        if s.rfind(",") > s.rfind("."):
-            s = s.replace(".", "")
-            s = s.replace(",", ".")
-        else:
-            s = s.replace(",", "")
-    else:
-        if "," in s:
-            s = s.replace(".", "")
-            s = s.replace(",", ".")
-    try:
-        return float(s)
-    except Exception:
-        return float("nan")
-
-def to_count(x):
-    """CONTAGENS (Solicitações/Cliques/Impressões) — entende '.' como milhar."""
-    s = str(x).strip().replace("\u00A0", " ")
-    s = s.replace("US$", "").replace("R$", "").replace("%", "")
-    s = s.replace(" ", "")
-    s = re.sub(r"[^0-9,\.]", "", s)
-    if "," in s and "." in s:
-        if s.rfind(",") > s.rfind("."):
-            s = s.replace(".", "")
-            s = s.split(",")[0]
-        else:
-            s = s.replace(",", "")
-            s = s.split(".")[0]
-    elif "," in s:
-        s = s.split(",")[0].replace(".", "")
-    elif "." in s:
-        if re.match(r"^\d{1,3}(\.\d{3})+$", s):
-            s = s.replace(".", "")
-        else:
-            s = s.split(".")[0]
-    s = s or "0"
-    try:
-        return int(s)
-    except Exception:
-        try:
-            return int(float(s))
-        except Exception:
-            return 0
-
-def detect_header_and_sep(raw: str):
-    """Identifica linha de cabeçalho real e separador (; , \t)."""
-    lines = [ln for ln in raw.splitlines() if ln.strip()]
-    keys = [
-        "bloco de anúncios","bloco de anuncios",
-        "cliques do ad exchange","ctr do ad exchange",
-        "taxa de correspondência","taxa de correspondencia",
-        "solicitações de anúncios","solicitacoes de anuncios",
-        "impressões do ad exchange","receita do ad exchange",
-        "cpc do ad exchange","ecpm medio do ad exchange"
-    ]
-    header_idx = 0
-    for i, ln in enumerate(lines[:60]):
-        ln_norm = unicodedata.normalize("NFKD", ln).lower()
-        if sum(1 for k in keys if k in ln_norm) >= 2:
-            header_idx = i
-            break
-    best_sep, max_cols = ";", 0
-    for sep in [";", ",", "\t"]:
-        ncols = len(lines[header_idx].split(sep))
-        if ncols > max_cols:
-            best_sep, max_cols = sep, ncols
-    return header_idx, best_sep
-
-def read_gam_csv(file):
-    raw = file.getvalue().decode("utf-8-sig", errors="ignore")
-    h, sep = detect_header_and_sep(raw)
-    return pd.read_csv(io.StringIO(raw), sep=sep, header=h)
-
-def find_col(df, parts):
-    for col in df.columns:
-        if all(p in normalize_text(col) for p in parts):
-            return col
-    return None
-
-def map_cols(df):
-    """Mapeia colunas importantes (algumas podem não existir no P2)."""
-    return {
-        "bloco":        find_col(df, ["bloco","anuncios"]) or find_col(df, ["bloco","anuncio"]),
-        "solicitacoes": find_col(df, ["solicitacoes"]),
-        "cliques":      find_col(df, ["cliques"]),
-        "ctr":          find_col(df, ["ctr"]),  # opcional no P2
-        "taxa":         find_col(df, ["taxa","correspondencia"]),
-        "cpc":          find_col(df, ["cpc"]),  # opcional no P2
-        "impressoes":   find_col(df, ["impressoes"]),
-        "receita":      find_col(df, ["receita"]),
-    }
-
-def get_total_or_sum(df, col_name, count=True):
-    """Usa linha 'Total' se existir; senão, soma linhas."""
-    conv = to_count if count else to_number
-    first_col = df.columns[0]
-    is_total = df[first_col].astype(str).str.strip().str.lower().eq("total")
-    if is_total.any():
-        return conv(df.loc[is_total, col_name].iloc[0])
-    return df.loc[~is_total, col_name].apply(conv).sum()
-
-def get_row(df, col_bloco, token):
-    """Retorna a primeira linha do bloco (ignorando 'Total')."""
-    first_col = df.columns[0]
-    dfx = df.loc[df[first_col].astype(str).str.strip().str.lower() != "total"]
-    dfx = dfx.dropna(subset=[col_bloco])
-    m = dfx[col_bloco].astype(str).str.contains(token, case=False, na=False)
-    return dfx[m].iloc[0] if m.any() else None
+def file_digest(file) -> str:
+    """Hash do conteúdo enviado (calculado uma vez por upload, não a cada rerun)."""
+    digests = st.session_state.setdefault("iadops_digests", {})
+    key = getattr(file, "file_id", None)
+    if key not in digests:
+        with file.getbuffer() as buf:
+            digests[key] = hashlib.blake2b(buf, digest_size=16).hexdigest()
+    return digests[key]
+
+@st.cache_resource
+def parse_pool():
+    """Threads de leitura compartilhadas (o parser do pyarrow libera o GIL)."""
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="iadops-parse")
+
+def load_logged(file, cols, records, **context):
+    """load_report e, no fim, as etapas medidas no log: uma vez por leitura, não a cada rerun."""
+    report = load_report(file, cols, records)
+    log_records(records, **context)
+    return report
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def parse_report(digest: str, cols: tuple, diag: bool, _file, _label=None):
+    """Leitura do relatório disparada já no upload; devolve (Future, etapas medidas ou None).
+
+    Memoizado pelo hash; ligar o diagnóstico relê o arquivo uma vez, já instrumentado."""
+    if not diag:
+        return parse_pool().submit(load_report, _file, list(cols)), None
+    diag_logger()
+    records = []
+    return parse_pool().submit(load_logged, _file, list(cols), records, relatorio=_label, digest=digest), records
+
+def start_parse(file, cols, diag=False, label=None):
+    """parse_report do upload; uma leitura que falhou sai do cache e recomeça no rerun seguinte."""
+    args = (file_digest(file), cols, diag, file, label)
+    fut, records = parse_report(*args)
+    if fut.done() and fut.exception() is not None:
+        parse_report.clear(*args)
+        fut, records = parse_report(*args)
+    return fut, records
+
+@st.cache_resource
+def diag_logger():
+    """Handler do logger "adops": uma linha JSON por etapa no log do servidor."""
+    log = logging.getLogger("adops")
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+    return log
+
+def upload_date(file):
+    """Data do relatório pelo preâmbulo; lida uma vez por upload, antes da leitura em segundo plano."""
+    dates = st.session_state.setdefault("iadops_dates", {})
+    key = getattr(file, "file_id", None)
+    if key not in dates:
+        dates[key] = report_date(peek_text(file))
+    return dates[key]
+
+# métricas do histórico por relatório: rótulo -> coluna em store.blocos_dia
+HIST_METRICS = {
+    "P1": {"CPC atual": "cpc", "CPC Alvo": "cpc_alvo", "Taxa de correspondência (%)": "taxa",
+           "CTR (%)": "ctr", "Perda (P1)": "perda", "Solicitações": "solicitacoes", "Cliques": "cliques"},
+    "P2": {"CPC Corrigido": "cpc_corrigido", "CPC atual": "cpc", "Taxa de correspondência (%)": "taxa",
+           "Perda de Usuário": "perda_usuario", "Receita": "receita", "Impressões": "impressoes",
+           "Solicitações": "solicitacoes", "Cliques": "cliques"},
+}
+
+def units_table(title, table, default_cats, key):
+    """Tabela ordenável de blocos com filtro por categoria e download em CSV."""
+    st.markdown(f"**{title}**")
+    cats = st.multiselect("Categorias", CATEGORIES[:4] + ("other",), default=default_cats, key=f"{key}_cats")
+    view = table[table["Categoria"].isin(cats)]
+    st.dataframe(
+        view, hide_index=True,
+        column_config={
+            c: st.column_config.NumberColumn(format="US$ %.4f")
+            for c in ("CPC atual", "CPC Alvo", "CPC Corrigido", "Receita") if c in view
+        },
+    )
+    st.download_button(
+        f"⬇️ Baixar CSV ({len(view):,} blocos)".replace(",", "."),
+        lambda: view.to_csv(index=False).encode("utf-8"), file_name=f"{key}.csv", mime="text/csv",
+        key=f"{key}_csv",
+    )
+
+# ===================== UI helpers =====================
 
 def badge(text, color="#22c55e"):
     return f"""<span style="display:inline-block;padding:.22rem .6rem;border-radius:12px;
@@ -148,41 +125,149 @@ def fmt_money(val):
 def fmt_pct(val):
     return "—" if (val is None or pd.isna(val)) else f"{val:.2f}%"
 
+def cpa_roas_inputs():
+    col_in1, col_in2 = st.columns(2)
+    with col_in1:
+        cpa = st.number_input("💰 CPA Médio (US$)", min_value=0.0, value=0.0, format="%.4f", key="iadops_cpa")
+    with col_in2:
+        roas = st.number_input("🎯 ROAS desejado (%)", min_value=0.0, value=0.0, format="%.2f", key="iadops_roas")
+    return cpa, roas
+
 # ===================== Inputs =====================
-col_in1, col_in2 = st.columns(2)
-with col_in1:
-    cpa_medio = st.number_input("💰 CPA Médio (US$)", min_value=0.0, value=0.0, format="%.4f")
-with col_in2:
-    roas_meta = st.number_input("🎯 ROAS desejado (%)", min_value=0.0, value=0.0, format="%.2f")
+modo = st.radio("Modo", ["Par P1/P2", "Lote (vários sites)", "Histórico", "Comparar datas"], horizontal=True)
+
+if modo == "Histórico":
+    sites = store.list_sites()
+    if not sites:
+        st.info("Histórico vazio. Processe um par P1/P2 e use **💾 Salvar no histórico**.")
+        st.stop()
+    h1, h2, h3 = st.columns(3)
+    with h1:
+        site = st.selectbox("Site", sites, format_func=lambda s: s or "(sem nome)")
+    with h2:
+        tipo = st.radio("Relatório", ["P1", "P2"], horizontal=True)
+    with h3:
+        metrica = st.selectbox("Métrica", list(HIST_METRICS[tipo]))
+    blocos = store.list_blocos(site, tipo)
+    destaque = [b for b, cat in blocos if cat in ("interstitial", "offerwall", "rewarded", "mob_top")]
+    escolhidos = st.multiselect("Blocos", [b for b, _ in blocos], default=destaque[:8])
+    dias = st.slider("Dias", 7, 365, 90)
+    serie = store.trend(site, tipo, HIST_METRICS[tipo][metrica], escolhidos, days=dias)
+    if serie.empty:
+        st.info("Sem dados no período.")
+    else:
+        st.line_chart(serie)
+    st.stop()
+
+if modo == "Comparar datas":
+    st.caption("Dois relatórios do mesmo tipo (P1 ou P2) de datas diferentes; os blocos são casados pelo nome normalizado.")
+    d1, d2 = st.columns(2)
+    with d1:
+        file_a = st.file_uploader("📁 Relatório anterior", type=["csv", "gz", "zip"], key="iadops_diff_a")
+    with d2:
+        file_b = st.file_uploader("📁 Relatório atual", type=["csv", "gz", "zip"], key="iadops_diff_b")
+    for f in (file_a, file_b):
+        if f:
+            upload_date(f)
+    if not (file_a and file_b):
+        st.stop()
+    # P2_COLS cobre todas as métricas; as que o relatório não tem ficam de fora
+    fut_a, _ = start_parse(file_a, P2_COLS)
+    fut_b, _ = start_parse(file_b, P2_COLS)
+    with st.spinner("Lendo relatórios..."):
+        wait([fut_a, fut_b])
+    rep_a, rep_b = fut_a.result(), fut_b.result()
+    if not (rep_a[1]["bloco"] and rep_b[1]["bloco"]):
+        st.error("❌ Coluna 'Bloco de anúncios' não encontrada em um dos relatórios.")
+        st.stop()
+    dia_a, dia_b = upload_date(file_a), upload_date(file_b)
+    if dia_a and dia_b:
+        st.caption(f"{dia_a:%d/%m/%Y} → {dia_b:%d/%m/%Y}")
+    l1, l2, l3 = st.columns(3)
+    with l1:
+        limiar = st.number_input("Variação significativa (%)", min_value=0.0, value=20.0, step=5.0)
+    with l2:
+        min_sol = st.number_input("Mínimo de solicitações", min_value=0, value=1000, step=500)
+    with l3:
+        so_mudancas = st.toggle("Só blocos sinalizados", value=True)
+    diff = compare(snapshot(rep_a), snapshot(rep_b), limiar / 100.0, min_sol)
+    contagem = diff["Status"].value_counts()
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Variaram", int(contagem.get("variou", 0)))
+    k2.metric("Novos", int(contagem.get("novo", 0)))
+    k3.metric("Removidos", int(contagem.get("removido", 0)))
+    k4.metric("Estáveis", int(contagem.get("estável", 0)))
+    view = diff[diff["Status"] != "estável"] if so_mudancas else diff
+    st.dataframe(
+        view, hide_index=True,
+        column_config={c: st.column_config.NumberColumn(format="%.1f%%") for c in view if c.startswith("Δ% ")},
+    )
+    st.download_button(
+        f"⬇️ Baixar CSV ({len(view):,} blocos)".replace(",", "."),
+        lambda: view.to_csv(index=False).encode("utf-8"), file_name="comparacao_blocos.csv", mime="text/csv",
+    )
+    st.stop()
+
+if modo == "Lote (vários sites)":
+    cpa_medio, roas_meta = cpa_roas_inputs()
+    files = st.file_uploader(
+        "📁 Enviar CSVs P1/P2 de vários sites (ou um ZIP)", type=["csv", "gz", "zip"], accept_multiple_files=True
+    )
+    st.caption("Nomeie os arquivos como `site_P1.csv` / `site_P2.csv` (ou `P1_site.csv`).")
+    if files:
+        pairs, incompletos, ignorados = pair_reports(expand_uploads(files))
+        st.write(f"**{len(pairs)}** par(es) encontrado(s): " + (", ".join(pairs) or "—"))
+        if incompletos:
+            st.warning("Sites sem o par P1/P2: " + ", ".join(incompletos))
+        if ignorados:
+            st.warning("Fora do padrão de nome: " + ", ".join(ignorados))
+        if pairs and st.button("🚀 Processar lote"):
+            with st.spinner(f"Precificando {len(pairs)} site(s)..."):
+                st.session_state["iadops_lote"] = run_batch(pairs, cpa_medio or 0.0, roas_meta or 0.0)
+        lote = st.session_state.get("iadops_lote")
+        if lote is not None:
+            st.dataframe(lote, hide_index=True)
+            st.download_button(
+                "⬇️ Baixar CSV", lambda: lote.to_csv(index=False).encode("utf-8"),
+                file_name="precificacao_lote.csv", mime="text/csv",
+            )
+    st.stop()
 
 c1, c2 = st.columns(2)
 with c1:
-    file_p1 = st.file_uploader("📁 Enviar CSV **P1**", type=["csv"])
+    file_p1 = st.file_uploader("📁 Enviar CSV **P1** (.csv, .csv.gz ou .zip)", type=["csv", "gz", "zip"])
 with c2:
-    file_p2 = st.file_uploader("📁 Enviar CSV **P2**", type=["csv"])
-
-if file_p1 and file_p2:
+    file_p2 = st.file_uploader("📁 Enviar CSV **P2** (.csv, .csv.gz ou .zip)", type=["csv", "gz", "zip"])
+
+# cada arquivo começa a ser lido assim que chega; P1 e P2 são lidos em paralelo
+for f in (file_p1, file_p2):
+    if f:
+        upload_date(f)  # o arquivo ainda não está com a thread de leitura
+diag = st.toggle("🩺 Diagnóstico", help="Mede tempo e memória de cada etapa (leitura, conversões, blocos, tela).")
+fut_p1, diag_p1 = start_parse(file_p1, P1_COLS, diag, "P1") if file_p1 else (None, None)
+fut_p2, diag_p2 = start_parse(file_p2, P2_COLS, diag, "P2") if file_p2 else (None, None)
+diag_page = []
+mark = checkpoints(diag_page) if diag else (lambda name=None: None)
+if bool(fut_p1) != bool(fut_p2):
+    st.caption("✅ P1 recebido — aguardando P2." if fut_p1 else "✅ P2 recebido — aguardando P1.")
+
+if fut_p1 and fut_p2:
     try:
+        mark("espera_leitura")
+        with st.spinner("Lendo relatórios..."):
+            wait([fut_p1, fut_p2])
         # --------- P1 ---------
-        p1 = read_gam_csv(file_p1)
-        m1 = map_cols(p1)
-        need1 = ["bloco","solicitacoes","cliques","ctr","taxa","cpc"]
-        miss1 = [k for k in need1 if not m1[k]]
+        rep1 = p1, m1, fmt1, u1 = fut_p1.result()
+        miss1 = missing_cols(m1, P1_NEED)
         if miss1:
             st.error("❌ P1: faltam colunas: " + ", ".join(miss1))
             st.stop()
 
-        p1["_sol"]  = p1[m1["solicitacoes"]].apply(to_count)
-        p1["_cli"]  = p1[m1["cliques"]].apply(to_count)
-        p1["_ctr"]  = p1[m1["ctr"]].apply(to_number)          # %
-        p1["_taxa"] = p1[m1["taxa"]].apply(to_number)         # %
-        p1["_cpc"]  = p1[m1["cpc"]].apply(to_number)          # US$
+        mark("blocos_p1")
 
-        inter_p1 = get_row(p1, m1["bloco"], "interstitial")
-        if inter_p1 is None:
-            inter_p1 = get_row(p1, m1["bloco"], "offerwall")
-        mob_p1   = get_row(p1, m1["bloco"], "mob_top")
-        cliques_p1_total = int(get_total_or_sum(p1, m1["cliques"], count=True))
+        inter_p1, _ = first_row(p1, u1, INTER_TOKENS)
+        mob_p1   = get_row(p1, u1, "mob_top")
+        cliques_p1_total = int(get_total_or_sum(p1, u1, "_cli"))
 
         solicit_i  = int(inter_p1["_sol"]) if inter_p1 is not None else 0
         ctr_i      = float(inter_p1["_ctr"]) if inter_p1 is not None else float("nan")
@@ -195,41 +280,27 @@ if file_p1 and file_p2:
         cpc_mob1   = float(mob_p1["_cpc"]) if mob_p1 is not None else float("nan")
 
         # --------- P2 ---------
-        p2 = read_gam_csv(file_p2)
-        m2 = map_cols(p2)
-        need2 = ["bloco","solicitacoes","cliques","impressoes","taxa","receita"]  # cpc/ctr opcionais
-        miss2 = [k for k in need2 if not m2[k]]
+        rep2 = p2, m2, fmt2, u2 = fut_p2.result()
+        miss2 = missing_cols(m2, P2_NEED)
         if miss2:
             st.error("❌ P2: faltam colunas: " + ", ".join(miss2))
             st.stop()
 
-        p2["_sol"]  = p2[m2["solicitacoes"]].apply(to_count)
-        p2["_cli"]  = p2[m2["cliques"]].apply(to_count)
-        p2["_imp"]  = p2[m2["impressoes"]].apply(to_count)
-        p2["_taxa"] = p2[m2["taxa"]].apply(to_number)         # %
-        p2["_rec"]  = p2[m2["receita"]].apply(to_number)      # US$
-        if m2["cpc"]:
-            p2["_cpc"] = p2[m2["cpc"]].apply(to_number)
-        if m2["ctr"]:
-            p2["_ctr"] = p2[m2["ctr"]].apply(to_number)
+        mark("blocos_p2")
 
-        cliques_p2_total = int(get_total_or_sum(p2, m2["cliques"], count=True))
+        cliques_p2_total = int(get_total_or_sum(p2, u2, "_cli"))
 
-        mob_p2 = get_row(p2, m2["bloco"], "mob_top")
+        mob_p2 = get_row(p2, u2, "mob_top")
 
         # guardamos o CPC atual do mob_top P2 para usar depois no comparativo
         cpc_mob2_val = float("nan")
         if mob_p2 is not None and m2["cpc"] and "_cpc" in mob_p2.index and pd.notna(mob_p2.get("_cpc")):
             cpc_mob2_val = to_number(mob_p2.get("_cpc"))
 
-        rewarded, rewarded_name = None, None
-        for tk in ["rewarded","reward","offerwall","offer_wall","offwall"]:
-            rewarded = get_row(p2, m2["bloco"], tk)
-            if rewarded is not None:
-                rewarded_name = tk
-                break
+        rewarded, rewarded_name = first_row(p2, u2, REWARDED_TOKENS)
 
         # ===================== OVERVIEW =====================
+        mark("tela")
 
         # ---------- P1 ----------
         st.subheader("📘 P1")
@@ -304,84 +375,138 @@ if file_p1 and file_p2:
         else:
             st.info("P2 não contém rewarded/offerwall (ok).")
 
-        # ===================== CÁLCULO: CPC Alvo (P1) =====================
-        st.divider()
-        st.subheader("🎯 CPC Alvo (P1)")
-
-        if solicit_i > 0:
-            perda = (solicit_i - (cliques_p1_total + cliques_p2_total)) / solicit_i
-            perda = max(perda, 0.0)
-        else:
-            perda = 0.0
-
-        roas_dec = (roas_meta or 0.0) / 100.0
-        cpc_alvo = (cpa_medio or 0.0) * roas_dec * (1.0 + perda)
-
-        cc1, cc2, cc3 = st.columns(3)
-        cc1.metric("Perda (P1)", f"{perda:.2%}")
-        cc2.metric("CPC Alvo (P1)", fmt_money(cpc_alvo))
-        cc3.metric("ROAS x CPA", f"{roas_meta:.2f}%  •  US$ {cpa_medio:.4f}")
-
-        def cmp_badge_greater_equal(a, b):
-            if pd.isna(a) or pd.isna(b):
-                return badge("—", "#94a3b8")
-            return badge("Bom (≥ alvo)", "#22c55e") if a >= b else badge("Abaixo do alvo", "#ef4444")
+        # ===================== PRECIFICAÇÃO =====================
+        # só esta parte depende de CPA/ROAS: mudar um deles reexecuta apenas o fragmento,
+        # sem redesenhar a visão geral dos relatórios
+        perda = float(calc_perda(solicit_i, cliques_p1_total + cliques_p2_total))
+
+        @st.fragment
+        def precificacao():
+            # roda sozinho nos reruns do fragmento: o try/except da página não o cobre
+            try:
+                # ===================== CÁLCULO: CPC Alvo (P1) =====================
+                st.divider()
+                st.subheader("🎯 CPC Alvo (P1)")
+                cpa_medio, roas_meta = cpa_roas_inputs()
+
+                cpc_alvo = calc_cpc_alvo(cpa_medio or 0.0, roas_meta or 0.0, perda)
+
+                cc1, cc2, cc3 = st.columns(3)
+                cc1.metric("Perda (P1)", f"{perda:.2%}")
+                cc2.metric("CPC Alvo (P1)", fmt_money(cpc_alvo))
+                cc3.metric("ROAS x CPA", f"{roas_meta:.2f}%  •  US$ {cpa_medio:.4f}")
+
+                def cmp_badge_greater_equal(a, b):
+                    if pd.isna(a) or pd.isna(b):
+                        return badge("—", "#94a3b8")
+                    return badge("Bom (≥ alvo)", "#22c55e") if a >= b else badge("Abaixo do alvo", "#ef4444")
+
+                st.markdown("&nbsp;")
+                st.markdown(
+                    f"**Interstitial/Offerwall** — CPC atual: {fmt_money(cpc_i)} • CPC alvo: {fmt_money(cpc_alvo)} {cmp_badge_greater_equal(cpc_i, cpc_alvo)}",
+                    unsafe_allow_html=True
+                )
+                st.markdown(
+                    f"**mob_top** — CPC atual: {fmt_money(cpc_mob1)} • CPC alvo: {fmt_money(cpc_alvo)} {cmp_badge_greater_equal(cpc_mob1, cpc_alvo)}",
+                    unsafe_allow_html=True
+                )
 
-        st.markdown("&nbsp;")
-        st.markdown(
-            f"**Interstitial/Offerwall** — CPC atual: {fmt_money(cpc_i)} • CPC alvo: {fmt_money(cpc_alvo)} {cmp_badge_greater_equal(cpc_i, cpc_alvo)}",
-            unsafe_allow_html=True
-        )
-        st.markdown(
-            f"**mob_top** — CPC atual: {fmt_money(cpc_mob1)} • CPC alvo: {fmt_money(cpc_alvo)} {cmp_badge_greater_equal(cpc_mob1, cpc_alvo)}",
-            unsafe_allow_html=True
-        )
-
-        # ===================== CÁLCULO: CPC Corrigido (P2) =====================
-        st.divider()
-        st.subheader("🧮 CPC Corrigido (P2 – rewarded/offerwall)")
+                # ===================== CÁLCULO: CPC Corrigido (P2) =====================
+                st.divider()
+                st.subheader("🧮 CPC Corrigido (P2 – rewarded/offerwall)")
 
-        if rewarded is None:
-            st.info("Não há linha de rewarded/offerwall na P2. Envie um CSV que contenha esse bloco para calcular o CPC Corrigido.")
-        else:
-            # Perda de Usuário = (Solicitações * Cobertura) - Impressões
-            rw_sol   = to_count(rewarded["_sol"])
-            rw_taxa  = to_number(rewarded["_taxa"]) / 100.0  # cobertura em decimal
-            rw_imp   = to_count(rewarded["_imp"])
-            rw_cli   = to_count(rewarded["_cli"])
-            rw_rec   = to_number(rewarded["_rec"])
-
-            perda_usuario = (rw_sol * rw_taxa) - rw_imp
-            # evita negativo:
-            perda_usuario = max(perda_usuario, 0.0)
-
-            denom = rw_cli + perda_usuario
-            cpc_corrigido = (rw_rec / denom) if denom > 0 else float("nan")
-
-            # Comparar com CPC do mob_top (P2)
-            status_badge = badge("—", "#94a3b8")
-            if not pd.isna(cpc_corrigido) and not pd.isna(cpc_mob2_val):
-                if cpc_corrigido >= cpc_mob2_val:
-                    status_badge = badge("Bom (corrigido ≥ mob_top)", "#22c55e")
+                if rewarded is None:
+                    st.info("Não há linha de rewarded/offerwall na P2. Envie um CSV que contenha esse bloco para calcular o CPC Corrigido.")
                 else:
-                    status_badge = badge("Abaixo (corrigido < mob_top)", "#ef4444")
-
-            pc1, pc2, pc3 = st.columns(3)
-            pc1.metric("Perda de Usuário", f"{int(round(perda_usuario)):,}".replace(",", "."))
-            pc2.metric("CPC Corrigido", fmt_money(cpc_corrigido))
-            pc3.metric("CPC Atual (mob_top P2)", fmt_money(cpc_mob2_val))
-
-            st.markdown(f"**Status:** {status_badge}", unsafe_allow_html=True)
-
-            with st.expander("Como calculamos (P2)?"):
-                st.markdown(
-                    "- **Perda de Usuário** = (Solicitações × Cobertura) − Impressões\n"
-                    "- **CPC Corrigido** = Receita ÷ (Cliques + Perda de Usuário)\n"
-                    "- Status: **Bom** se CPC Corrigido ≥ CPC atual do **mob_top** da P2."
-                )
+                    # Perda de Usuário = (Solicitações * Cobertura) - Impressões
+                    rw_sol   = to_count(rewarded["_sol"])
+                    rw_taxa  = to_number(rewarded["_taxa"])  # cobertura em %
+                    rw_imp   = to_count(rewarded["_imp"])
+                    rw_cli   = to_count(rewarded["_cli"])
+                    rw_rec   = to_number(rewarded["_rec"])
+
+                    perda_usuario = float(calc_perda_usuario(rw_sol, rw_taxa, rw_imp))
+                    cpc_corrigido = float(calc_cpc_corrigido(rw_rec, rw_cli, perda_usuario))
+
+                    # Comparar com CPC do mob_top (P2)
+                    status_badge = badge("—", "#94a3b8")
+                    if not pd.isna(cpc_corrigido) and not pd.isna(cpc_mob2_val):
+                        if cpc_corrigido >= cpc_mob2_val:
+                            status_badge = badge("Bom (corrigido ≥ mob_top)", "#22c55e")
+                        else:
+                            status_badge = badge("Abaixo (corrigido < mob_top)", "#ef4444")
+
+                    pc1, pc2, pc3 = st.columns(3)
+                    pc1.metric("Perda de Usuário", f"{int(round(perda_usuario)):,}".replace(",", "."))
+                    pc2.metric("CPC Corrigido", fmt_money(cpc_corrigido))
+                    pc3.metric("CPC Atual (mob_top P2)", fmt_money(cpc_mob2_val))
+
+                    st.markdown(f"**Status:** {status_badge}", unsafe_allow_html=True)
+
+                    with st.expander("Como calculamos (P2)?"):
+                        st.markdown(
+                            "- **Perda de Usuário** = (Solicitações × Cobertura) − Impressões\n"
+                            "- **CPC Corrigido** = Receita ÷ (Cliques + Perda de Usuário)\n"
+                            "- Status: **Bom** se CPC Corrigido ≥ CPC atual do **mob_top** da P2."
+                        )
+
+                # ===================== TODOS OS BLOCOS =====================
+                st.divider()
+                if st.toggle("📋 Precificar todos os blocos", help="Calcula P1 e P2 para cada bloco do relatório, não só o primeiro."):
+                    units_table(
+                        "CPC Alvo por bloco (P1)",
+                        price_units_p1(p1, u1, m1["bloco"], unit_clicks(p2, u2, m2["bloco"]),
+                                       cpa_medio or 0.0, roas_meta or 0.0),
+                        ["interstitial", "offerwall"], "cpc_alvo_p1",
+                    )
+                    st.caption("Por bloco, linhas repetidas do mesmo bloco são somadas e a Perda usa os cliques do "
+                               "próprio bloco (P1 + bloco de mesmo nome na P2); o card acima usa os totais dos relatórios.")
+                    units_table(
+                        "CPC Corrigido por bloco (P2)",
+                        price_units_p2(p2, u2, m2["bloco"], cpc_mob2_val),
+                        ["rewarded", "offerwall"], "cpc_corrigido_p2",
+                    )
+
+                with st.expander("💾 Salvar no histórico"):
+                    s1, s2 = st.columns(2)
+                    with s1:
+                        dia = st.date_input("Dia do relatório", upload_date(file_p1) or date.today(), format="DD/MM/YYYY")
+                    with s2:
+                        site = st.text_input("Site", help="Opcional; separa o histórico de sites diferentes.")
+                    if st.button("Salvar"):
+                        novos = store.ingest_pair(
+                            dia, normalize_text(site), rep1, rep2, (file_digest(file_p1), file_digest(file_p2)),
+                            cpa_medio or 0.0, roas_meta or 0.0,
+                        )
+                        if any(novos):
+                            st.success(f"Relatórios de {dia:%d/%m/%Y} salvos no histórico.")
+                        else:
+                            st.info("Esses relatórios já estavam no histórico.")
+            except Exception as e:
+                st.error(f"Erro ao processar os arquivos: {e}")
+
+        precificacao()
 
         with st.expander("Mapeamento de colunas"):
             st.write({"P1": m1, "P2": m2})
+            st.caption("Separador decimal inferido por coluna (pt = vírgula, en = ponto):")
+            st.write({"P1": fmt1, "P2": fmt2})
+
+        mark()
+        if diag:
+            with st.expander("🩺 Diagnóstico", expanded=True):
+                etapas = pd.DataFrame(
+                    [{"relatório": "P1", **r} for r in diag_p1]
+                    + [{"relatório": "P2", **r} for r in diag_p2]
+                    + [{"relatório": "página", **r} for r in diag_page]
+                )
+                st.dataframe(etapas, hide_index=True)
+                st.caption("Pico de memória: tracemalloc (Python e NumPy) + pool do Arrow. P1 e P2 são lidos em "
+                           "paralelo, então o pico de um inclui o do outro; o tracemalloc deixa as etapas mais lentas.")
+            diag_logger()
+            log_records(diag_page, relatorio="pagina")  # as etapas de leitura saem da própria leitura
 
     except Exception as e:
         st.error(f"Erro ao processar os arquivos: {e}")
+    finally:
+        mark()
@@ -1,6 +1,12 @@
 import streamlit as st
 import streamlit.components.v1 as components
 
+from adops.charts import heatmap
+from adops.pricing import (
+    MAX_SCENARIOS, VARIACOES, calc_cpc_alvo, calc_perda, frange, frange_len, sweep_cpc_alvo, sweep_table,
+)
+from adops.rules import RULE_FIELDS, match_columns, price_rules_p1, read_rules
+
 st.set_page_config(page_title="Precificação P1")
 
 st.title("📊 Precificação P1")
@@ -8,6 +14,35 @@ st.markdown("Use esta ferramenta para calcular a **Perda** e o **CPC Alvo** com
 
 st.divider()
 
+modo = st.radio("Modo", ["Cálculo único", "Varredura de cenários", "Planilha de regras"], horizontal=True)
+
+if modo == "Planilha de regras":
+    arquivo = st.file_uploader("📁 Planilha de regras (.csv, .csv.gz ou .zip)", type=["csv", "gz", "zip"])
+    st.caption("Uma regra por linha, com colunas de Solicitações, Cliques P1, Cliques P2, CPA e ROAS (%).")
+    if arquivo:
+        regras = read_rules(arquivo)
+        auto = match_columns(list(regras.columns), "P1")
+        opcoes = [None, *regras.columns]
+        mapa = {}
+        for col, (campo, (rotulo, _, _)) in zip(st.columns(len(auto)), RULE_FIELDS["P1"].items()):
+            mapa[campo] = col.selectbox(rotulo, opcoes, index=opcoes.index(auto[campo]), format_func=lambda c: c or "—")
+        faltando = [RULE_FIELDS["P1"][c][0] for c, v in mapa.items() if v is None]
+        if faltando:
+            st.error("⚠️ Escolha a coluna de: " + ", ".join(faltando))
+            st.stop()
+
+        resultado = price_rules_p1(regras, mapa)
+        problemas = int((resultado["Status"] != "ok").sum())
+        st.success(f"✅ {len(resultado):,} regras calculadas".replace(",", "."))
+        if problemas:
+            st.warning(f"⚠️ {problemas:,} regra(s) sem resultado; veja a coluna Status.".replace(",", "."))
+        st.dataframe(resultado.head(1000), hide_index=True)
+        st.download_button(
+            "⬇️ Baixar CSV", lambda: resultado.to_csv(index=False).encode("utf-8"),
+            file_name="regras_p1.csv", mime="text/csv",
+        )
+    st.stop()
+
 # Layout: colunas para inputs lado a lado
 col1, col2, col3 = st.columns(3)
 
@@ -18,6 +53,41 @@ with col2:
 with col3:
     cliques_p2 = st.number_input("Cliques P2", min_value=0)
 
+if modo == "Varredura de cenários":
+    if solicitacoes_p1 == 0:
+        st.error("⚠️ As solicitações não podem ser zero.")
+        st.stop()
+    perda = float(calc_perda(solicitacoes_p1, cliques_p1 + cliques_p2))
+    st.caption(f"Perda calculada: {perda:.2%}")
+
+    v1, v2, v3 = st.columns(3)
+    cpa_de = v1.number_input("CPA de (R$)", min_value=0.0, value=0.10, format="%.2f")
+    cpa_ate = v2.number_input("CPA até (R$)", min_value=0.0, value=5.00, format="%.2f")
+    cpa_passo = v3.number_input("Passo do CPA", min_value=0.0001, value=0.10, format="%.4f")
+    r1, r2, r3 = st.columns(3)
+    roas_de = r1.number_input("ROAS de (%)", min_value=0.0, value=50.0, format="%.2f")
+    roas_ate = r2.number_input("ROAS até (%)", min_value=0.0, value=300.0, format="%.2f")
+    roas_passo = r3.number_input("Passo do ROAS", min_value=0.01, value=10.0, format="%.2f")
+    direcao = st.radio("Variação para:", ["Aumentar", "Diminuir"], horizontal=True)
+
+    n = frange_len(cpa_de, cpa_ate, cpa_passo) * frange_len(roas_de, roas_ate, roas_passo)
+    if n > MAX_SCENARIOS:
+        st.error(f"⚠️ Grade grande demais ({n:,} cenários). Aumente os passos.".replace(",", "."))
+        st.stop()
+    cpas, roases = frange(cpa_de, cpa_ate, cpa_passo), frange(roas_de, roas_ate, roas_passo)
+    grade = sweep_cpc_alvo(cpas, roases, perda)
+    st.caption(f"{grade.size:,} cenários × {len(VARIACOES)} faixas de variação".replace(",", "."))
+    st.altair_chart(heatmap(grade, roases, cpas, "ROAS (%)", "CPA", "CPC Alvo"), width="stretch")
+
+    tabela = sweep_table({"CPA": cpas[:, None], "ROAS (%)": roases[None, :]}, "CPC Alvo", grade, direcao)
+    st.dataframe(tabela.head(1000), hide_index=True)
+    st.download_button(
+        f"⬇️ Baixar CSV ({len(tabela):,} linhas)".replace(",", "."),
+        lambda: tabela.to_csv(index=False).encode("utf-8"),
+        file_name="cenarios_cpc_alvo.csv", mime="text/csv",
+    )
+    st.stop()
+
 col4, col5 = st.columns(2)
 with col4:
     cpa_medio = st.number_input("CPA Médio (R$)", min_value=0.0, format="%.2f")
@@ -31,11 +101,8 @@ if st.button("🔍 Calcular"):
     if solicitacoes_p1 == 0:
         st.error("⚠️ As solicitações não podem ser zero.")
     else:
-        perda = (solicitacoes_p1 - (cliques_p1 + cliques_p2)) / solicitacoes_p1
-        perda = max(perda, 0)
-
-        roas_decimal = roas_meta / 100
-        cpc_alvo = cpa_medio * roas_decimal * (1 + perda)
+        perda = float(calc_perda(solicitacoes_p1, cliques_p1 + cliques_p2))
+        cpc_alvo = float(calc_cpc_alvo(cpa_medio, roas_meta, perda))
 
         perda_formatada = f"{perda:.2%}"
         cpc_formatado = f"R$ {cpc_alvo:.4f}"
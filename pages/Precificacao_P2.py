@@ -1,6 +1,12 @@
 import streamlit as st
 import streamlit.components.v1 as components
 
+from adops.charts import heatmap
+from adops.pricing import (
+    MAX_SCENARIOS, VARIACOES, calc_cpc_corrigido, calc_perda_usuario, frange, frange_len, sweep_cpc_corrigido, sweep_table,
+)
+from adops.rules import RULE_FIELDS, match_columns, price_rules_p2, read_rules
+
 st.set_page_config(page_title="Precificação P2")
 
 st.title("📈 Precificação P2")
@@ -8,6 +14,35 @@ st.markdown("Use esta ferramenta para calcular a **Perda de Usuário** e o **CPC
 
 st.divider()
 
+modo = st.radio("Modo", ["Cálculo único", "Varredura de cenários", "Planilha de regras"], horizontal=True)
+
+if modo == "Planilha de regras":
+    arquivo = st.file_uploader("📁 Planilha de regras (.csv, .csv.gz ou .zip)", type=["csv", "gz", "zip"])
+    st.caption("Uma regra por linha, com colunas de Solicitações, Cobertura (%), Impressões, Receita e Cliques.")
+    if arquivo:
+        regras = read_rules(arquivo)
+        auto = match_columns(list(regras.columns), "P2")
+        opcoes = [None, *regras.columns]
+        mapa = {}
+        for col, (campo, (rotulo, _, _)) in zip(st.columns(len(auto)), RULE_FIELDS["P2"].items()):
+            mapa[campo] = col.selectbox(rotulo, opcoes, index=opcoes.index(auto[campo]), format_func=lambda c: c or "—")
+        faltando = [RULE_FIELDS["P2"][c][0] for c, v in mapa.items() if v is None]
+        if faltando:
+            st.error("⚠️ Escolha a coluna de: " + ", ".join(faltando))
+            st.stop()
+
+        resultado = price_rules_p2(regras, mapa)
+        problemas = int((resultado["Status"] != "ok").sum())
+        st.success(f"✅ {len(resultado):,} regras calculadas".replace(",", "."))
+        if problemas:
+            st.warning(f"⚠️ {problemas:,} regra(s) sem resultado; veja a coluna Status.".replace(",", "."))
+        st.dataframe(resultado.head(1000), hide_index=True)
+        st.download_button(
+            "⬇️ Baixar CSV", lambda: resultado.to_csv(index=False).encode("utf-8"),
+            file_name="regras_p2.csv", mime="text/csv",
+        )
+    st.stop()
+
 # Inputs divididos
 col1, col2, col3 = st.columns(3)
 
@@ -24,18 +59,51 @@ with col4:
 with col5:
     cliques = st.number_input("Cliques", min_value=0)
 
+if modo == "Varredura de cenários":
+    st.caption("Solicitações, Impressões e Cliques ficam fixos; a grade varre Cobertura × Receita.")
+    v1, v2, v3 = st.columns(3)
+    cob_de = v1.number_input("Cobertura de (%)", min_value=0.0, value=10.0, format="%.2f")
+    cob_ate = v2.number_input("Cobertura até (%)", min_value=0.0, value=100.0, format="%.2f")
+    cob_passo = v3.number_input("Passo da Cobertura", min_value=0.01, value=5.0, format="%.2f")
+    r1, r2, r3 = st.columns(3)
+    rec_de = r1.number_input("Receita de (R$)", min_value=0.0, value=0.0, format="%.2f")
+    rec_ate = r2.number_input("Receita até (R$)", min_value=0.0, value=max(receita, 1000.0), format="%.2f")
+    rec_passo = r3.number_input("Passo da Receita", min_value=0.01, value=50.0, format="%.2f")
+    direcao = st.radio("Variação para:", ["Aumentar", "Diminuir"], horizontal=True)
+
+    n = frange_len(cob_de, cob_ate, cob_passo) * frange_len(rec_de, rec_ate, rec_passo)
+    if n > MAX_SCENARIOS:
+        st.error(f"⚠️ Grade grande demais ({n:,} cenários). Aumente os passos.".replace(",", "."))
+        st.stop()
+    coberturas, receitas = frange(cob_de, cob_ate, cob_passo), frange(rec_de, rec_ate, rec_passo)
+    grade = sweep_cpc_corrigido(solicitacoes, coberturas, impressoes, receitas, cliques)
+    st.caption(
+        f"{grade.size:,} cenários × {len(VARIACOES)} faixas de variação".replace(",", ".")
+        + " (células vazias: Cliques + Perda de Usuário = 0)"
+    )
+    st.altair_chart(heatmap(grade, receitas, coberturas, "Receita", "Cobertura (%)", "CPC Corrigido"), width="stretch")
+
+    tabela = sweep_table(
+        {"Cobertura (%)": coberturas[:, None], "Receita": receitas[None, :]}, "CPC Corrigido", grade, direcao
+    )
+    st.dataframe(tabela.head(1000), hide_index=True)
+    st.download_button(
+        f"⬇️ Baixar CSV ({len(tabela):,} linhas)".replace(",", "."),
+        lambda: tabela.to_csv(index=False).encode("utf-8"),
+        file_name="cenarios_cpc_corrigido.csv", mime="text/csv",
+    )
+    st.stop()
+
 st.divider()
 
 # Botão para calcular
 if st.button("🔍 Calcular"):
-    perda_usuario = (solicitacoes * (cobertura / 100)) - impressoes
-    perda_usuario = max(perda_usuario, 0)
+    perda_usuario = float(calc_perda_usuario(solicitacoes, cobertura, impressoes))
 
-    denominador = cliques + perda_usuario
-    if denominador == 0:
+    if cliques + perda_usuario == 0:
         st.error("⚠️ Cliques + Perda de Usuário não pode ser zero.")
     else:
-        cpc_corrigido = receita / denominador
+        cpc_corrigido = float(calc_cpc_corrigido(receita, cliques, perda_usuario))
 
         perda_formatada = f"{perda_usuario:.0f}"
         cpc_formatado = f"R$ {cpc_corrigido:.4f}"
@@ -0,0 +1,46 @@
+"""Cache de cabeçalhos em disco: modelo conhecido pula a detecção; disco inutilizável só desliga o cache."""
+import io
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adops import parsing  # noqa: E402
+from adops.parsing import load_report, mapped_header  # noqa: E402
+from adops.pricing import P1_COLS  # noqa: E402
+
+CSV = (
+    "Relatório do Ad Exchange\nPeríodo: 01/10/2026 - 01/10/2026\n\n"
+    "Bloco de anúncios;Solicitações de anúncios;Cliques do Ad Exchange;CTR do Ad Exchange;"
+    "Taxa de correspondência;CPC do Ad Exchange (US$)\n"
+    "app_interstitial;1.000;10;1,00%;50,00%;0,5000\n"
+    "Total;1.000;10;1,00%;50,00%;0,5000\n"
+).encode("utf-8")
+
+@pytest.fixture(autouse=True)
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(parsing, "_header_cache", None)
+
+def test_known_header_skips_detection(tmp_path, monkeypatch):
+    monkeypatch.setenv("ADOPS_HOME", str(tmp_path))
+    first = mapped_header(io.BytesIO(CSV))
+    assert (tmp_path / "cabecalhos.json").exists()
+
+    def no_scan(*args, **kwargs):
+        raise AssertionError("cabeçalho conhecido não deveria ser detectado de novo")
+
+    monkeypatch.setattr(parsing, "_header_cache", None)  # relido do disco, como num processo novo
+    monkeypatch.setattr(parsing, "detect_header_and_sep", no_scan)
+    monkeypatch.setattr(parsing, "map_cols", no_scan)
+    assert mapped_header(io.BytesIO(CSV)) == first
+    assert first[0][:3] == (3, 2, ";")
+
+def test_unusable_data_dir_only_disables_cache(tmp_path, monkeypatch):
+    blocker = tmp_path / "arquivo"
+    blocker.write_text("")
+    monkeypatch.setenv("ADOPS_HOME", str(blocker / "sub"))  # mkdir falha: NotADirectoryError
+    df, m, _, _ = load_report(io.BytesIO(CSV), list(P1_COLS))
+    assert m["bloco"] == "Bloco de anúncios"
+    assert df["_sol"].tolist() == [1000, 1000]
@@ -0,0 +1,97 @@
+"""col_to_number/col_to_count contra as versões por célula (to_number/to_count)."""
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adops import parsing  # noqa: E402
+from adops.parsing import col_to_count, col_to_number, parse_col, to_count, to_number  # noqa: E402
+
+INT64_MAX = np.iinfo(np.int64).max
+EDGE = [
+    None, "", "   ", ".", ",", "5.", ".5", ",5", "5,", "-", "--1", "1-", "- 1", "%-1", "-.5", "-0", "+1",
+    "1e5", "nan", "inf", "1_000", "١٢", "\t12\t", "1.2.3", "1,2.3", "1.234", "1.234.567", "12.34.567",
+    ".123.456", "123.456.7", "1.234,56", "1,234.56", "1 234,5", "1\u00A0234,5", "0012,50", "12,34%", "R$ 1.234,56",
+    "US$1,234.56", "R$\u00A01.234", "RUS$$1", "99999999999999999999", "1.234.567.890.123.456.789,5",
+    "0000000000000000000000001", "US$", "R$", "US$ ", "US$-1", "R$-1,5", "US$ - 1", "US$  1", "R$R$1", "US$US$1",
+    "US$1.234,5", "R$ 1,234.5", "USD 1", "U$ 1", "1 R$", "US$\u00A01", "US$ 1,234,567,890,123.4567",
+]
+
+def _cells(n, seed):
+    """Números formatados em pt-BR/en-US (com moeda, %, sinal) misturados com lixo."""
+    rnd = random.Random(seed)
+    alphabet = list("0123456789") * 6 + list(",.,. %-") * 2 + ["US$", "R$", "\u00A0", "+", "e", "\t", "_", "é"]
+    out = []
+    for _ in range(n):
+        r = rnd.random()
+        if r < 0.05:
+            out.append(None)
+        elif r < 0.5:
+            v = rnd.choice([rnd.randint(0, 10 ** rnd.randint(1, 22)), rnd.uniform(0, 1e6)])
+            s = f"{v:,.{rnd.randint(0, 4)}f}"
+            if rnd.random() < 0.5:
+                s = s.replace(",", "\0").replace(".", ",").replace("\0", ".")
+            if rnd.random() < 0.2:
+                s = rnd.choice(["R$ ", "US$", "-", " "]) + s
+            if rnd.random() < 0.2:
+                s += rnd.choice(["%", " ", "\u00A0"])
+            out.append(s)
+        else:
+            out.append("".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, rnd.choice([6, 12, 30])))))
+    return out
+
+def _same_floats(got, ref):
+    return np.array_equal(got, ref, equal_nan=True) and np.array_equal(np.signbit(got), np.signbit(ref))
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_col_to_number_matches_to_number(seed):
+    s = pd.Series(_cells(20_000, seed) + EDGE, dtype="string[pyarrow]")
+    ref = np.array([to_number(v) for v in s], dtype="float64")
+    assert _same_floats(col_to_number(s).to_numpy(), ref)
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_col_to_count_matches_to_count(seed):
+    s = pd.Series(_cells(20_000, seed) + EDGE, dtype="string[pyarrow]")
+    ref = np.array([min(to_count(v), INT64_MAX) for v in s], dtype="int64")  # acima do int64: o maior int64
+    assert np.array_equal(col_to_count(s).to_numpy(), ref)
+
+def test_large_currency_column(monkeypatch):
+    """Moeda à frente em toda a coluna, em vários blocos da varredura (o último incompleto)."""
+    monkeypatch.setattr(parsing, "_SCAN_BLOCK", 4096)
+    rnd = np.random.default_rng(7)
+    v = rnd.uniform(0, 1e6, 50_000)
+    cells = [f"US$ {x:,.4f}" if i % 3 else f"R$ {x:.2f}".replace(".", ",") for i, x in enumerate(v)]
+    s = pd.Series(cells + EDGE, dtype="string[pyarrow]")
+    ref = np.array([to_number(c) for c in s], dtype="float64")
+    assert _same_floats(col_to_number(s).to_numpy(), ref)
+
+def test_object_column_and_offset_slice():
+    s = pd.Series(EDGE * 3, dtype=object).iloc[5:]
+    assert _same_floats(col_to_number(s).to_numpy(), np.array([to_number(v) for v in s], dtype="float64"))
+    assert col_to_count(s).tolist() == [min(to_count(v), INT64_MAX) for v in s]
+
+def test_overflow_does_not_raise():
+    s = pd.Series(["99999999999999999999", "1"])
+    assert col_to_count(s).tolist() == [INT64_MAX, 1]
+    assert col_to_number(s).tolist() == [1e20, 1.0]
+
+def test_numeric_columns_pass_through():
+    assert col_to_count(pd.Series([-3, 4])).tolist() == [3, 4]
+    assert col_to_number(pd.Series([1, 2])).dtype == "float64"
+
+@pytest.mark.parametrize("cells, kind, locale, expected", [
+    (["1.234", "12.345.678", "1.234,5", "-1.234"], "number", "pt", [1234.0, 12345678.0, 1234.5, -1234.0]),
+    (["1,234", "12,345,678", "1,234.5", "0.5"], "number", "en", [1234.0, 12345678.0, 1234.5, 0.5]),
+    (["1,234", "12,345,678", "1.5", "1,234.9"], "count", "en", [1234, 12345678, 1, 1234]),
+    (["1.234", "1.234,9", "99999999999999999999", "12345678901234567"], "count", "pt",
+     [1234, 1234, INT64_MAX, 12345678901234567]),
+])
+def test_parse_col_follows_inferred_locale(cells, kind, locale, expected):
+    out, got = parse_col(pd.Series(cells, dtype="string[pyarrow]"), kind)
+    assert got == locale
+    assert out.tolist() == expected
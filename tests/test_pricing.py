@@ -0,0 +1,53 @@
+"""Precificação por bloco: blocos repetidos em várias linhas do relatório."""
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adops.pricing import calc_cpc_alvo, price_units_p1, unit_clicks  # noqa: E402
+from adops.units import build_unit_index  # noqa: E402
+
+def _report(rows):
+    df = pd.DataFrame(rows, columns=["bloco", "_sol", "_cli", "_cpc"])
+    return df, build_unit_index(df, "bloco")
+
+P1 = [
+    ("app_interstitial", 100_000, 1_000, 0.50),
+    ("app_mob_top", 50_000, 500, 0.20),
+    ("app_interstitial", 40_000, 400, 0.80),
+    ("Total", 190_000, 1_900, 0.45),
+]
+P2 = [
+    ("app_interstitial", 10_000, 30_000, 0.1),
+    ("app_interstitial", 10_000, 20_000, 0.1),
+    ("app_rewarded", 10_000, 5_000, 0.1),
+    ("Total", 30_000, 55_000, 0.1),
+]
+
+def test_repeated_bloco_is_priced_once():
+    p1, u1 = _report(P1)
+    p2, u2 = _report(P2)
+    t = price_units_p1(p1, u1, "bloco", unit_clicks(p2, u2, "bloco"), 1.5, 120.0).set_index("Bloco")
+    assert list(t.index) == ["app_interstitial", "app_mob_top"]
+    inter = t.loc["app_interstitial"]
+    # solicitações e cliques do P1 somados antes de juntar os 50.000 cliques da P2
+    assert inter["Solicitações"] == 140_000
+    assert inter["Cliques P1+P2"] == 1_400 + 50_000
+    assert inter["Perda (%)"] == pytest.approx((140_000 - 51_400) / 140_000 * 100)
+    assert inter["CPC Alvo"] == pytest.approx(calc_cpc_alvo(1.5, 120.0, (140_000 - 51_400) / 140_000))
+    assert inter["CPC atual"] == pytest.approx((0.50 * 100_000 + 0.80 * 40_000) / 140_000)
+    assert inter["Categoria"] == "interstitial"
+    mob = t.loc["app_mob_top"]
+    assert (mob["Cliques P1+P2"], mob["Perda (%)"]) == (500, pytest.approx(99.0))
+
+def test_without_p2_and_missing_cpc():
+    p1, u1 = _report(P1[:3] + [("app_mob_top", 10_000, 0, np.nan)])
+    t = price_units_p1(p1, u1, "bloco", None, 1.0, 100.0).set_index("Bloco")
+    assert t.loc["app_interstitial", "Cliques P1+P2"] == 1_400
+    # a linha sem CPC não entra na média, mas as solicitações dela contam na Perda
+    assert t.loc["app_mob_top", "CPC atual"] == pytest.approx(0.20)
+    assert t.loc["app_mob_top", "Solicitações"] == 60_000
@@ -0,0 +1,56 @@
+"""stage(): o pico de memória vem de contagens de alocação, então memória reaproveitada também conta."""
+import sys
+import threading
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pyarrow as pa
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from adops.profiling import stage  # noqa: E402
+
+def _churn():
+    for _ in range(3):
+        a = np.ones(2**20)  # 8 MB, liberados a cada volta: o RSS quase não sobe
+        del a
+
+def test_reused_numpy_memory_counts():
+    _churn()
+    rec = []
+    with stage(rec, "numpy"):
+        _churn()
+    assert 7.5 < rec[0]["pico_mb"] < 12
+    assert not tracemalloc.is_tracing()
+
+def test_arrow_pool_counts():
+    rec = []
+    with stage(rec, "arrow"):
+        arr = pa.array(np.arange(2**20, dtype="int64"))  # 8 MB no pool do Arrow
+        del arr
+    assert rec[0]["pico_mb"] >= 7.5
+
+def test_overlapping_stages_keep_their_peaks():
+    rec, inside, leave = [], threading.Event(), threading.Event()
+
+    def other():
+        with stage(rec, "outra"):
+            inside.set()
+            leave.wait()
+
+    t = threading.Thread(target=other)
+    t.start()
+    inside.wait()
+    with stage(rec, "numpy"):
+        _churn()
+    leave.set()
+    t.join()
+    peaks = {r["etapa"]: r["pico_mb"] for r in rec}
+    assert peaks["numpy"] > 7.5 and peaks["outra"] > 7.5
+
+def test_time_only():
+    rec = []
+    with stage(rec, "tempo", memory=False):
+        pass
+    assert rec[0]["pico_mb"] is None and rec[0]["segundos"] >= 0